@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: descriptions/sec for the original linear RULES scan vs the
+compiled CategorizationEngine.
+
+    cd backend && python -m benchmarks.bench_categorizer [n]
+"""
+import random
+import sys
+import time
+
+from typing import Tuple
+
+from services.categorizer import RULES, categorize_transactions
+
+SAMPLES = [
+    "Card Purchase 06/14 Sq *Vigneshwara LLC Tempe AZ Card 4781",
+    "Card Purchase 06/15 Uber Trip Help.Uber.Com CA Card 4781",
+    "Card Purchase 06/16 Walmart Store #1234 Tempe AZ Card 4781",
+    "Card Purchase 06/17 Starbucks Store 0042 Phoenix AZ Card 4781",
+    "Card Purchase 06/18 Netflix.Com Los Gatos CA Card 4781",
+    "Card Purchase 06/19 Random Merchant Xyz Mesa AZ Card 4781",
+    "Card Purchase 06/20 Shell Oil 57444 Tempe AZ Card 4781",
+    "Discover E-Payment 1234 Web ID: 2510020270",
+    "Zelle Payment To John 1234567",
+    "Recurring Card Purchase 06/21 Spotify USA New York NY Card 4781",
+    "ATM Withdrawal 06/22 1000 E University Dr Tempe AZ Card 4781",
+    "Online Transfer To Sav ...1234 Transaction#: 21345",
+    "Card Purchase 06/23 Imt Desert Palm Rent Tempe AZ Card 4781",
+    "Card Purchase 06/24 Amc Theatres 1234 Tempe AZ Card 4781",
+    "Card Purchase 06/25 Trader Joe's #123 Tempe AZ Card 4781",
+    "Card Purchase 06/26 Taco Shop 99 Gilbert AZ Card 4781",
+]
+
+def categorize_linear(description: str) -> Tuple[str, str]:
+    """The original one-search-per-rule scan: the baseline, and the reference in tests."""
+    desc = description.lower()
+    for pattern, cat, sub in RULES:
+        if pattern.search(desc):
+            return cat, sub
+    return "Uncategorized", "Uncategorized"
+
+def _rate(fn, descriptions) -> float:
+    start = time.perf_counter()
+    for d in descriptions:
+        fn(d)
+    return len(descriptions) / (time.perf_counter() - start)
+
+def main(n: int = 200_000) -> None:
+    rnd = random.Random(42)
+    descriptions = [rnd.choice(SAMPLES) for _ in range(n)]
+
+    mismatches = sum(1 for d in SAMPLES if categorize_linear(d) != categorize_transactions(d))
+    before = _rate(categorize_linear, descriptions)
+    after = _rate(categorize_transactions, descriptions)
+
+    print(f"descriptions:     {n:,}")
+    print(f"linear RULES scan {before:12,.0f} desc/s")
+    print(f"compiled engine   {after:12,.0f} desc/s  ({after / before:.1f}x)")
+    print(f"sample mismatches {mismatches}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,80 @@
+"""
+/statements/import throughput: a synthetic N-row Chase-style CSV (default
+300k) parsed alone, parsed + categorized, then imported into a fresh temp DB
+with and without parse/insert overlap, plus a re-import (all duplicates).
+
+    cd backend && python -m benchmarks.bench_import [rows]
+"""
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base, make_engine
+from models import orm  # noqa: F401  (registers tables)
+from services import importer
+from services.ingestion import SpendSummary
+from services.parsers import CsvParser
+
+from benchmarks.bench_categorizer import SAMPLES
+
+def _csv(n: int, seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    first = date(2023, 1, 1)
+    out = io.StringIO()
+    out.write("Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n")
+    balance = 10_000.0
+    for i in range(n):
+        d = first + timedelta(days=i * 365 // n)
+        amount = -round(rnd.uniform(1, 200), 2) if rnd.random() < 0.85 else round(rnd.uniform(100, 2000), 2)
+        balance += amount
+        desc = f"{rnd.choice(SAMPLES)} {i}"
+        out.write(f"{'DEBIT' if amount < 0 else 'CREDIT'},{d:%m/%d/%Y},{desc},{amount:.2f},"
+                  f"MISC,{balance:.2f},\n")
+    return out.getvalue().encode()
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+def _import(data: bytes, prefetch: int):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    importer.IMPORT_PREFETCH = prefetch
+    with Session() as s:
+        first = _timed(lambda: importer.import_statement(s, io.BytesIO(data)))
+        again = _timed(lambda: importer.import_statement(s, io.BytesIO(data)))
+    engine.dispose()
+    return first, again
+
+def main(n: int = 300_000) -> None:
+    data = _csv(n)
+    print(f"{n:,} rows, {len(data) / 1e6:.1f} MB")
+
+    secs, rows = _timed(lambda: sum(1 for _ in CsvParser().stream(io.BytesIO(data))))
+    print(f"parse               {secs * 1000:8.0f}ms  {rows / secs:10,.0f} rows/s")
+
+    def parse_categorize():
+        spend = SpendSummary()
+        return sum(len(b) for b in importer._categorized_batches(
+            "bench", "csv", CsvParser().stream(io.BytesIO(data)), spend, importer.IMPORT_BATCH_SIZE))
+    secs, rows = _timed(parse_categorize)
+    print(f"parse + categorize  {secs * 1000:8.0f}ms  {rows / secs:10,.0f} rows/s")
+
+    for label, prefetch in (("import (serial)", 0), ("import (overlap)", importer.IMPORT_PREFETCH)):
+        (secs, out), (secs_again, again) = _import(data, prefetch)
+        print(f"{label:18s}  {secs * 1000:8.0f}ms  {out['seen_rows'] / secs:10,.0f} rows/s  "
+              f"inserted={out['inserted_rows']:,}  timings={out['timings_ms']}")
+        print(f"  re-import         {secs_again * 1000:8.0f}ms  {again['seen_rows'] / secs_again:10,.0f} rows/s  "
+              f"duplicates={again['duplicates_skipped']:,}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,52 @@
+"""
+Cold import profile for the app (`import main`), i.e. what every uvicorn
+worker and every --reload restart pays before serving a request.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters, reports the
+median cumulative import time of `main` and the slowest top-level packages.
+
+    cd backend && python -m benchmarks.bench_import_time [runs] [top]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile_once(module: str = "main") -> dict:
+    """{module name: cumulative microseconds} for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        out.setdefault(name.strip(), int(cumulative))
+    return out
+
+def main(runs: int = 5, top: int = 10) -> None:
+    profiles = [profile_once() for _ in range(runs)]
+    totals = [p.get("main", 0) / 1000 for p in profiles]
+    print(f"import main: median {statistics.median(totals):.0f}ms  "
+          f"min {min(totals):.0f}ms  max {max(totals):.0f}ms  ({runs} runs)")
+
+    roots = {}
+    for name, us in profiles[-1].items():
+        if "." not in name and name != "main":
+            roots[name] = us
+    print(f"slowest top-level imports (last run):")
+    for name, us in sorted(roots.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    for heavy in ("boto3", "qdrant_client"):
+        print(f"{heavy} imported at startup: {'yes' if heavy in profiles[-1] else 'no'}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10)
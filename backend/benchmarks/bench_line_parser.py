@@ -0,0 +1,123 @@
+"""
+Line-classifier throughput: lines/sec for the original per-line classifier
+(13 lowercase passes, inline regexes) vs `parse_line` on a synthetic Chase
+statement corpus of N extracted text lines (default 100k), with the usual mix
+of transaction rows, wrapped rows, headers and page furniture.
+
+    cd backend && python -m benchmarks.bench_line_parser [lines] [repeats]
+"""
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Dict, Optional
+
+from services.pdf_parser import IGNORE_SUBSTRINGS, MONEY, _clean_spaces, parse_line
+
+MERCHANTS = [
+    "Card Purchase 06/14 Sq *Vigneshwara LLC Tempe AZ Card 4781",
+    "Card Purchase With Pin 06/15 Walmart Store #1234 Tempe AZ Card 4781",
+    "Recurring Card Purchase 06/21 Spotify USA New York NY Card 4781",
+    "Zelle Payment To John 1234567",
+    "Discover E-Payment 1234 Web ID: 2510020270",
+    "Online Transfer To Sav ...1234 Transaction#: 21345",
+    "ATM Withdrawal 06/22 1000 E University Dr Tempe AZ Card 4781",
+]
+NOISE = [
+    "JPMorgan Chase Bank, N.A. Member FDIC",
+    "P O Box 182051",
+    "Columbus, OH 43218 - 2051",
+    "Account Number: 000000123456789",
+    "Chase College Checking",
+    "*start*transaction detail",
+    "DATE DESCRIPTION AMOUNT BALANCE",
+    "Beginning Balance $7,134.47",
+    "Ending Balance $1,254.10",
+    "Page 3 of 26",
+    "This Page Intentionally Left Blank",
+    "IN CASE OF ERRORS OR QUESTIONS ABOUT YOUR ELECTRONIC FUNDS TRANSFERS:",
+    "Total Deposits and Additions $8,910.44",
+    "06/30 Page of 26",
+]
+
+def _money(rnd: random.Random, negative: bool) -> str:
+    s = f"{rnd.uniform(1, 9999):,.2f}"
+    return f"-{s}" if negative else s
+
+def corpus(n: int, seed: int = 7):
+    """~60% transactions (some with trailing text), ~40% noise/headers."""
+    rnd = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        r = rnd.random()
+        if r < 0.55:
+            day = rnd.randrange(1, 29)
+            lines.append(f"06/{day:02d}  {rnd.choice(MERCHANTS)}   {_money(rnd, True)} {_money(rnd, False)}")
+        elif r < 0.60:
+            day = rnd.randrange(1, 29)
+            lines.append(f"06/{day:02d} {rnd.choice(MERCHANTS)} {_money(rnd, True)} {_money(rnd, False)} *")
+        else:
+            lines.append(rnd.choice(NOISE))
+    return lines
+
+LINE_RE = re.compile(
+    rf"^(?P<date>\d{{2}}/\d{{2}})\s+(?P<desc>.*?)\s+(?P<amount>{MONEY})\s+(?P<balance>{MONEY})$"
+)
+
+def _parse_line_linear(raw: str) -> Optional[Dict[str, str]]:
+    """The original per-line classifier (the baseline)."""
+    line = _clean_spaces(raw.strip())
+    if not line or line[0].isalpha():
+        return None
+    for s in IGNORE_SUBSTRINGS:
+        if s.lower() in line.lower():
+            return None
+
+    m = LINE_RE.match(line)
+    if not m:
+        money_tokens = re.findall(MONEY, line)
+        if len(money_tokens) >= 2 and re.match(r"^\d{2}/\d{2}\b", line):
+            date = line.split()[0]
+            amount_str, balance_str = money_tokens[-2], money_tokens[-1]
+            desc = line[len(date):line.rfind(amount_str)].strip()
+        else:
+            return None
+    else:
+        date = m.group("date")
+        desc = m.group("desc").strip()
+        amount_str = m.group("amount")
+        balance_str = m.group("balance")
+
+    def to_float(x: str) -> float:
+        return float(x.replace(",", ""))
+
+    try:
+        return {"date": date, "description": desc, "amount": to_float(amount_str), "balance": to_float(balance_str)}
+    except ValueError:
+        return None
+
+def _rate(fn, lines, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for line in lines:
+            fn(line)
+        times.append(time.perf_counter() - t0)
+    return len(lines) / statistics.median(times)
+
+def main(n: int = 100_000, repeats: int = 5) -> None:
+    lines = corpus(n)
+    mismatches = sum(1 for line in lines if _parse_line_linear(line) != parse_line(line))
+    parsed = sum(1 for line in lines if parse_line(line))
+    before = _rate(_parse_line_linear, lines, repeats)
+    after = _rate(parse_line, lines, repeats)
+
+    print(f"lines:            {n:,}  ({parsed:,} transactions)")
+    print(f"linear classifier {before:12,.0f} lines/s")
+    print(f"parse_line        {after:12,.0f} lines/s  ({after / before:.1f}x)")
+    print(f"mismatches        {mismatches}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
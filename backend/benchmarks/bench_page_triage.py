@@ -0,0 +1,43 @@
+"""
+Page triage on a real statement: serial `extract_transactions` with
+PDF_PAGE_TRIAGE off vs on, median of N runs, plus the triage counters and a
+check that both produce identical rows.
+
+    cd backend && python -m benchmarks.bench_page_triage statement.pdf [repeats]
+"""
+import statistics
+import sys
+import time
+
+from services import pdf_parser
+
+def _run(pdf_bytes: bytes, triage: bool, repeats: int):
+    pdf_parser.PDF_PAGE_TRIAGE = triage
+    times, rows = [], None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        rows = pdf_parser.extract_transactions(pdf_bytes, workers=0)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), rows
+
+def main(path: str, repeats: int = 3) -> None:
+    with open(path, "rb") as f:
+        pdf_bytes = f.read()
+
+    ms_off, rows_off = _run(pdf_bytes, False, repeats)
+    before = pdf_parser.triage_stats()
+    ms_on, rows_on = _run(pdf_bytes, True, repeats)
+    after = pdf_parser.triage_stats()
+    per_run = {k: (after[k] - before[k]) / repeats for k in pdf_parser.TRIAGE_COUNTERS}
+
+    print(f"pages:        {per_run['pages']:.0f}  parsed {per_run['parsed']:.0f}  "
+          f"skipped empty {per_run['skipped_empty']:.0f} / no markers {per_run['skipped_no_markers']:.0f}")
+    print(f"triage off    {ms_off:9.1f}ms")
+    print(f"triage on     {ms_on:9.1f}ms  (triage {per_run['triage_ms']:.1f}ms, "
+          f"saved {ms_off - ms_on:.1f}ms, {ms_off / ms_on:.1f}x)")
+    print(f"rows          {len(rows_on)}  identical={rows_on == rows_off}")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,95 @@
+"""
+/emissions/range query at scale: N transactions (default 1M) spread over
+36 monthly statements, then the cross-statement range summary for one month,
+one quarter and one year, with and without ix_txn_posted_cat_sub.
+
+    cd backend && python -m benchmarks.bench_range_query [rows] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base, make_engine
+from models import orm  # noqa: F401  (registers tables)
+from services.categorizer import RULES
+from services.emissions import range_summary
+from services.repository import INSERT_TRANSACTION_SQL
+
+PAIRS = sorted({(cat, sub) for _, cat, sub in RULES}) + [("Uncategorized", "Uncategorized")]
+FIRST_DAY = date(2022, 1, 1)
+N_STATEMENTS = 36
+
+def _rows(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        d = FIRST_DAY + timedelta(days=rnd.randrange(N_STATEMENTS * 365 // 12))
+        cat, sub = rnd.choice(PAIRS)
+        yield {
+            "statement_id": f"stmt-{d.year}-{d.month:02d}",
+            "date": d.strftime("%m/%d"),
+            "description": f"Card Purchase Merchant {i}",
+            "amount": -round(rnd.uniform(1, 200), 2) if rnd.random() < 0.85 else round(rnd.uniform(100, 2000), 2),
+            "balance": None,
+            "category": cat,
+            "subcategory": sub,
+            "source": "bench",
+            "posted_on": d.isoformat(),
+        }
+
+def _load(Session, n: int, batch: int = 50_000) -> float:
+    t0 = time.perf_counter()
+    it = _rows(n)
+    with Session() as s:
+        while True:
+            chunk = [r for _, r in zip(range(batch), it)]
+            if not chunk:
+                break
+            s.execute(INSERT_TRANSACTION_SQL, chunk)
+        s.commit()
+    return time.perf_counter() - t0
+
+def _time(Session, start: str, end: str, repeats: int) -> tuple:
+    times = []
+    with Session() as s:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            out = range_summary(s, start, end)
+            times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times), out["totals"]["transactions"]
+
+def main(n: int = 1_000_000, repeats: int = 5) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    print(f"loading {n:,} rows ...", end=" ", flush=True)
+    print(f"{_load(Session, n):.1f}s")
+
+    windows = [("month", "2023-06-01", "2023-06-30"),
+               ("quarter", "2023-04-01", "2023-06-30"),
+               ("year", "2023-01-01", "2023-12-31")]
+    results = {}
+    for label in ("indexed", "no index"):
+        if label == "no index":
+            with engine.begin() as conn:
+                conn.execute(text("DROP INDEX ix_txn_posted_cat_sub"))
+        for name, start, end in windows:
+            results[(label, name)] = _time(Session, start, end, repeats)
+
+    for name, _, _ in windows:
+        (ms_idx, rows), (ms_scan, _) = results[("indexed", name)], results[("no index", name)]
+        print(f"{name:8s} rows={rows:8,d}  indexed={ms_idx:8.1f}ms  no index={ms_scan:8.1f}ms  "
+              f"speedup={ms_scan / ms_idx:5.1f}x")
+    engine.dispose()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
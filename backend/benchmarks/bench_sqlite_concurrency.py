@@ -0,0 +1,118 @@
+"""
+Concurrent read/write benchmark for the SQLite storage profiles.
+
+One writer thread keeps saving statements (several insert batches per
+transaction, like a multi-batch /statements/save) while reader threads run
+the per-statement spend aggregate used by /emissions against other
+statements. Reports reader latency for each profile.
+
+    cd backend && python -m benchmarks.bench_sqlite_concurrency [seconds] [readers]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base, make_engine
+from models import orm  # noqa: F401  (registers tables)
+
+INSERT = text("""
+    INSERT OR IGNORE INTO transactions
+      (statement_id, date, description, amount, balance, category, subcategory, source)
+    VALUES
+      (:statement_id, :date, :description, :amount, :balance, :category, :subcategory, :source)
+""")
+READ = text("""
+    SELECT category, subcategory, SUM(ABS(CASE WHEN amount < 0 THEN amount ELSE 0 END))
+    FROM transactions
+    WHERE statement_id = :sid
+    GROUP BY category, subcategory
+""")
+
+def _rows(sid: str, n: int, offset: int):
+    rnd = random.Random(offset)
+    return [{
+        "statement_id": sid,
+        "date": f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}",
+        "description": f"Card Purchase Merchant {offset + i}",
+        "amount": -round(rnd.uniform(1, 200), 2),
+        "balance": None,
+        "category": rnd.choice(["Food", "Travel", "Shopping"]),
+        "subcategory": rnd.choice(["A", "B", "C"]),
+        "source": "bench",
+    } for i in range(n)]
+
+def run(profile: str, seconds: float, readers: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}", profile=profile, pool_size=readers + 2)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as s:
+        for b in range(20):
+            s.execute(INSERT, _rows(f"s{b % 4}", 1000, b * 1000))
+        s.commit()
+
+    stop = threading.Event()
+    latencies, errors, batches = [], [0], [0]
+    lock = threading.Lock()
+
+    def writer():
+        offset = 1_000_000
+        with Session() as s:
+            while not stop.is_set():
+                for _ in range(10):
+                    s.execute(INSERT, _rows("w", 2000, offset))
+                    offset += 2000
+                    batches[0] += 1
+                s.commit()
+
+    def reader():
+        with Session() as s:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    s.execute(READ, {"sid": f"s{random.randint(0, 3)}"}).fetchall()
+                    s.commit()
+                except Exception:
+                    s.rollback()
+                    errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "reads": len(latencies),
+        "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else float("nan"),
+        "max_ms": latencies[-1] if latencies else float("nan"),
+        "read_errors": errors[0],
+        "write_batches": batches[0],
+    }
+
+def main(seconds: float = 5.0, readers: int = 4) -> None:
+    print(f"{seconds:.0f}s per profile, 1 writer, {readers} readers")
+    for profile in ("default", "tuned"):
+        r = run(profile, seconds, readers)
+        print(f"{profile:8s} reads={r['reads']:6d}  p50={r['p50_ms']:7.2f}ms  p95={r['p95_ms']:7.2f}ms  "
+              f"max={r['max_ms']:8.2f}ms  read_errors={r['read_errors']}  write_batches={r['write_batches']}")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 import os
 
@@ -7,7 +9,60 @@ DB_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "data")
 os.makedirs(DB_DIR, exist_ok=True)
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.abspath(os.path.join(DB_DIR, 'app.db'))}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Storage profiles: PRAGMAs applied to every new SQLite connection.
+# "tuned" uses WAL so /emissions readers don't block behind /statements/save
+# writers, and busy_timeout so concurrent writers wait instead of failing
+# with "database is locked". Pick one with DB_PROFILE.
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,           # ms
+        "cache_size": -64000,           # negative = KiB, ~64 MB
+        "mmap_size": 268435456,         # 256 MB
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned")
+
+# Connections are pooled per process. Size the pool for the threads that touch
+# the DB inside one uvicorn worker (DB_CONCURRENCY + JOB_WORKERS by default);
+# with N workers (WEB_CONCURRENCY) the app holds up to N x (size + overflow).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+
+def make_engine(url: str, profile: str = DB_PROFILE, pool_size: int = DB_POOL_SIZE,
+                max_overflow: int = DB_MAX_OVERFLOW) -> Engine:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
+    pragmas = SQLITE_PROFILES[profile]
+
+    eng = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+
+    @event.listens_for(eng, "connect")
+    def _apply_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cur.execute(f"PRAGMA {name}={value}")
+        cur.close()
+        # Let SQLAlchemy own BEGIN instead of pysqlite's implicit transactions,
+        # otherwise SAVEPOINTs (Session.begin_nested) don't nest correctly.
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(eng, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return eng
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
@@ -0,0 +1,45 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Schema changes for databases created by an earlier version. create_all()
+# only creates missing tables, so new columns/indexes on existing tables are
+# added (and superseded indexes dropped) here. Every step is idempotent and
+# runs at startup.
+# Rows saved before posted_on existed start out NULL. They are dated at startup
+# (pipeline.backfill_posted_on) when their statement period is in the parse
+# cache, or when the statement is uploaded again; until then /emissions/range
+# and the dashboard date filters don't see them.
+ADDED_COLUMNS = [
+    ("transactions", "posted_on", "VARCHAR(10)"),
+]
+ADDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_txn_posted_cat_sub ON transactions (posted_on, category, subcategory, amount)",
+]
+
+# Single-column transaction indexes that no query uses (statement_id is the
+# leading column of uq_txn_key, category of ix_txn_cat_sub); each one slowed
+# every insert.
+DROPPED_INDEXES = [
+    "ix_transactions_id",
+    "ix_transactions_statement_id",
+    "ix_transactions_date",
+    "ix_transactions_description",
+    "ix_transactions_amount",
+    "ix_transactions_category",
+    "ix_transactions_subcategory",
+]
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+                print(f"🛠️ Added {table}.{column}")
+        for ddl in ADDED_INDEXES:
+            conn.execute(text(ddl))
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for name in DROPPED_INDEXES:
+            if name in existing:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+                print(f"🛠️ Dropped index {name}")
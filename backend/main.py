@@ -1,10 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 from routers.user import router as user_router
 from routers.statements import router as statements_router
 from routers.emissions import router as emissions_router
-from db.database import Base, engine
+from routers.dashboard import router as dashboard_router
+from db.database import Base, engine, SessionLocal
+from db.migrations import run_migrations
 from models import orm as orm_models
+from services import executors, jobs
+from services.parse_cache import get_parse_cache
+from services.pipeline import backfill_posted_on
+from services.repository import backfill_statement_aggregates
 
 app = FastAPI(title="Sustainable Financial Advisor")
 
@@ -16,13 +24,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(OperationalError)
+def database_busy(_request: Request, exc: OperationalError):
+    # e.g. "database is locked" after busy_timeout: nothing was written, retry later.
+    print(f"❌ Database error: {exc.orig if exc.orig is not None else exc}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, please retry"},
+                        headers={"Retry-After": "1"})
+
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with SessionLocal() as db:
+        backfilled = backfill_statement_aggregates(db)
+        dated = backfill_posted_on(db)
+    if backfilled:
+        print(f"📊 Backfilled aggregates for {backfilled} statement(s)")
+    if dated:
+        print(f"📅 Backfilled posted_on for {dated} transaction(s)")
+    get_parse_cache()  # drops parse-cache files from other parser versions
+    jobs.resume_pending()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    executors.shutdown()
 
 app.include_router(user_router, prefix="/user", tags=["User"])
 app.include_router(statements_router, prefix="/statements", tags=["Statements"])
 app.include_router(emissions_router, prefix="/emissions", tags=["Emissions"])
+app.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
+
+
+@app.get("/health", summary="Liveness check with execution pool metrics")
+def health():
+    return {"status": "ok", "pools": executors.stats()}
 
 
 @app.get("/", include_in_schema=False)
@@ -30,16 +65,29 @@ def root():
     return {
         "status": "ok",
         "endpoints": {
+            "/health": [],
             "/user": [
                 "/profile",
                 "/analyze"
             ],
             "/statements": [
                 "/categorize",
-                "/save"
+                "/save",
+                "/cache/stats",
+                "/jobs/{statement_id}"
             ],
             "/emissions": [
-                "/categorize/{statement_id}"
+                "/categorize/{statement_id}",
+                "/spend/{statement_id}",
+                "/range",
+                "/recommendations",
+                "/recommendations/ready"
+            ],
+            "/dashboard": [
+                "/totals",
+                "/categories",
+                "/merchants",
+                "/cache/stats"
             ]
         }
     }
\ No newline at end of file
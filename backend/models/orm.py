@@ -1,23 +1,27 @@
-from sqlalchemy import Column, Integer, String, Float, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, String, Float, Text, UniqueConstraint, Index
 
 from db.database import Base
 
 class TransactionORM(Base):
     __tablename__ = "transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
-    statement_id = Column(String(64), index=True)
-    date = Column(String(20), index=True)
-    description = Column(String(1024), index=True)
-    amount = Column(Float, index=True)
+    # Every index is paid on each insert, so only the ones queries use:
+    # uq_txn_key also serves WHERE statement_id = ?, ix_txn_cat_sub serves category.
+    id = Column(Integer, primary_key=True)
+    statement_id = Column(String(64))
+    date = Column(String(20))
+    description = Column(String(1024))
+    amount = Column(Float)
     balance = Column(Float, nullable=True)
-    category = Column(String(100), index=True)
-    subcategory = Column(String(150), index=True)
+    category = Column(String(100))
+    subcategory = Column(String(150))
     source = Column(String(50), default="chase_pdf")
+    posted_on = Column(String(10), nullable=True)   # YYYY-MM-DD, from `date` + statement period
 
     __table_args__ = (
         UniqueConstraint("statement_id", "date", "description", "amount", name="uq_txn_key"),
         Index("ix_txn_cat_sub", "category", "subcategory"),
+        Index("ix_txn_posted_cat_sub", "posted_on", "category", "subcategory", "amount"),
     )
 
 class CategorySummaryORM(Base):
@@ -33,4 +37,46 @@ class CategorySummaryORM(Base):
         UniqueConstraint("statement_id", "category", "subcategory",
                          name="uq_stmt_cat_sub"),
         Index("ix_stmt_cat", "statement_id", "category"),
-    )
\ No newline at end of file
+    )
+
+class StatementAggregateORM(Base):
+    """
+    Expense spend and transaction count per (statement, category, subcategory),
+    maintained by stream_insert_transactions from newly inserted rows only.
+    category = subcategory = "*" holds the statement totals.
+    """
+    __tablename__ = "statement_aggregates"
+
+    statement_id = Column(String(64), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    subcategory = Column(String(150), primary_key=True)
+    spend = Column(Float, nullable=False, default=0.0)      # sum of |amount| for amount < 0
+    txn_count = Column(Integer, nullable=False, default=0)
+
+class StatementVersionORM(Base):
+    """Bumped whenever a statement's category_summaries or transactions change (cache/ETag key)."""
+    __tablename__ = "statement_versions"
+
+    statement_id = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(Float)
+
+class IngestionJobORM(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    statement_id = Column(String(64), index=True)
+    kind = Column(String(20))                      # "save" | "analyze"
+    status = Column(String(20), index=True)        # queued | running | done | failed
+    params = Column(Text, default="{}")            # JSON request options
+    pages_total = Column(Integer, default=0)
+    pages_parsed = Column(Integer, default=0)
+    rows_inserted = Column(Integer, default=0)
+    result = Column(Text, nullable=True)           # JSON response payload
+    error = Column(Text, nullable=True)
+    created_at = Column(Float)
+    updated_at = Column(Float)
+
+    __table_args__ = (
+        UniqueConstraint("statement_id", "kind", name="uq_job_stmt_kind"),
+    )
@@ -0,0 +1,63 @@
+from typing import Optional
+from fastapi import APIRouter, Query, Depends, HTTPException
+from sqlalchemy.orm import Session
+from db.database import SessionLocal
+from services.analytics import (
+    ALL_STATEMENTS, analytics_cache, get_frame, totals, category_breakdown, top_merchants,
+)
+
+router = APIRouter()
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+DATE = r"^\d{4}-\d{2}-\d{2}$"
+
+def _frame_and_mask(db: Session, statement_id: Optional[str], start: Optional[str], end: Optional[str]):
+    frame = get_frame(db, statement_id or ALL_STATEMENTS)
+    if statement_id and not len(frame):
+        raise HTTPException(status_code=404, detail="statement_id not found (no transactions saved)")
+    to_int = lambda d: int(d.replace("-", "")) if d else None
+    return frame, frame.mask(to_int(start), to_int(end))
+
+@router.get("/totals", summary="Spend, income, emissions and date span")
+def dashboard_totals(
+    statement_id: Optional[str] = Query(None, description="One statement; omit for all saved statements"),
+    start: Optional[str] = Query(None, pattern=DATE),
+    end: Optional[str] = Query(None, pattern=DATE),
+    mode: str = Query("mid", pattern="^(min|mid|max)$"),
+    db: Session = Depends(get_db),
+):
+    frame, mask = _frame_and_mask(db, statement_id, start, end)
+    return {"statement_id": statement_id, "mode": mode, **totals(frame, mode, mask)}
+
+@router.get("/categories", summary="Spend and emissions per category and subcategory")
+def dashboard_categories(
+    statement_id: Optional[str] = Query(None, description="One statement; omit for all saved statements"),
+    start: Optional[str] = Query(None, pattern=DATE),
+    end: Optional[str] = Query(None, pattern=DATE),
+    mode: str = Query("mid", pattern="^(min|mid|max)$"),
+    db: Session = Depends(get_db),
+):
+    frame, mask = _frame_and_mask(db, statement_id, start, end)
+    return {"statement_id": statement_id, "mode": mode, "by_category": category_breakdown(frame, mode, mask)}
+
+@router.get("/merchants", summary="Top merchants by spend")
+def dashboard_merchants(
+    statement_id: Optional[str] = Query(None, description="One statement; omit for all saved statements"),
+    start: Optional[str] = Query(None, pattern=DATE),
+    end: Optional[str] = Query(None, pattern=DATE),
+    limit: int = Query(10, ge=1, le=100),
+    mode: str = Query("mid", pattern="^(min|mid|max)$"),
+    db: Session = Depends(get_db),
+):
+    frame, mask = _frame_and_mask(db, statement_id, start, end)
+    return {"statement_id": statement_id, "mode": mode, "merchants": top_merchants(frame, limit, mode, mask)}
+
+@router.get("/cache/stats", summary="Analytics frame cache counters")
+def dashboard_cache_stats():
+    return analytics_cache.stats()
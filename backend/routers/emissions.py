@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from db.database import SessionLocal
-from services.emissions import compute_emissions_from_summary
-from services.recommendations import recommendation_engine
+from services.emissions import cached_emissions, range_summary, spend_summary
+from services.recommendations import get_recommendation_engine
 
 router = APIRouter()
 
@@ -17,17 +19,60 @@ def get_db():
 @router.get("/categorize/{statement_id}")
 def emissions_by_statement(
     statement_id: str,
+    request: Request,
     mode: str = Query("mid", pattern="^(min|mid|max)$"),
     db: Session = Depends(get_db),
 ):
-    exists = db.execute(
-        text("SELECT 1 FROM category_summaries WHERE statement_id=:sid LIMIT 1"),
-        {"sid": statement_id}
-    ).fetchone()
-    if not exists:
+    """
+    Emissions per subcategory. Responses carry an ETag tied to the statement's
+    summary version; send it back as If-None-Match to get a 304 while the
+    summaries are unchanged.
+    """
+    cached = cached_emissions(db, statement_id, mode=mode)
+    if cached is None:
         raise HTTPException(status_code=404, detail="statement_id not found (no summaries stored)")
 
-    return compute_emissions_from_summary(db, statement_id, mode=mode)
+    etag, payload = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+@router.get("/spend/{statement_id}")
+def spend_by_statement(
+    statement_id: str,
+    mode: str = Query("mid", pattern="^(min|mid|max)$"),
+    db: Session = Depends(get_db),
+):
+    """Spend, transaction counts and emissions from the transactions saved via /statements/save."""
+    summary = spend_summary(db, statement_id, mode=mode)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="statement_id not found (no transactions saved)")
+    return summary
+
+@router.get("/range")
+def emissions_by_range(
+    start: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$", description="First posted date (YYYY-MM-DD)"),
+    end: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$", description="Last posted date (YYYY-MM-DD)"),
+    mode: str = Query("mid", pattern="^(min|mid|max)$"),
+    statement_id: Optional[List[str]] = Query(None, description="Limit to these statements (repeatable)"),
+    db: Session = Depends(get_db),
+):
+    """Monthly and per-category spend/emissions across saved statements."""
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return range_summary(db, start, end, mode=mode, statement_ids=statement_id)
+
+@router.get("/recommendations/ready")
+async def recommendations_ready(warm: bool = Query(False, description="Create the Qdrant/Bedrock clients if not yet initialized")):
+    """
+    Readiness probe for the recommendation engine. Clients are created on first
+    use; pass warm=true to initialize them now (e.g. from a deploy hook).
+    """
+    engine = get_recommendation_engine()
+    if warm:
+        return await asyncio.to_thread(engine.readiness, True)
+    return engine.readiness()
 
 @router.post("/recommendations")
 async def generate_recommendations(analysis_data: dict):
@@ -46,7 +91,7 @@ async def generate_recommendations(analysis_data: dict):
             }
         
         # Generate recommendations
-        recommendations = recommendation_engine.get_recommendations(analysis_data)
+        recommendations = await get_recommendation_engine().aget_recommendations(analysis_data)
         
         # Ensure everything is JSON serializable
         safe_recommendations = []
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from db.database import SessionLocal
-from services.repository import bulk_insert_transactions, upsert_category_summaries
 from models.schemas import SummaryResponse
-from services.pdf_parser import parse_pdf, extract_transactions
-from services.categorizer import summarize_transactions, categorize_transactions
+from services.parse_cache import get_parse_cache
+from services.pdf_parser import triage_stats
+from services.categorizer import merchant_cache
+from services.emissions import emissions_cache
+from services.executors import run_db
+from services.pipeline import IngestionRun, save_skips
+from services.parsers import accepts_filename, supported_extensions
+from services.importer import import_statement
+from services import jobs
 
 import hashlib
 
@@ -23,82 +30,84 @@ def get_db():
 def sha256_hex(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
-@router.post("/categorize", response_model=SummaryResponse, summary="Upload a Chase PDF to categorize spend")
-async def categorize(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Please upload a .pdf file")
+def check_upload(filename: str, streaming: bool = False) -> None:
+    if not accepts_filename(filename, streaming):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Please upload a statement ({', '.join(supported_extensions(streaming))})",
+        )
 
-    pdf_bytes = await file.read()
-    statement_id = sha256_hex(pdf_bytes)
+@router.post("/categorize", response_model=SummaryResponse, summary="Upload a statement (Chase PDF, CSV or OFX) to categorize spend")
+async def categorize(
+    file: UploadFile = File(...),
+    persist: bool = Query(True, description="Also save the parsed transactions (default: true)"),
+    db: Session = Depends(get_db),
+):
+    check_upload(file.filename)
+    contents = await file.read()
+    statement_id = sha256_hex(contents)
 
+    # Same pipeline as /user/analyze and /statements/save, minus emissions
+    skip = ["emissions"] + ([] if persist else ["persist"])
+    run = IngestionRun(db, statement_id, contents, skip=skip)
     try:
-        transactions = parse_pdf(pdf_bytes)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse PDF: {e}")
-
-    summary, uncategorized_total = summarize_transactions(transactions)
+        await run.arun()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse statement: {e}")
     # summary is expected like: { "Travel": {"Flights": 1000.0, "Ride-hailing": 25.0}, ... }
 
-    # Flatten and upsert into SQLite
-    rows = []
-    for cat, subs in summary.items():
-        for sub, amt in subs.items():
-            rows.append({
-                "statement_id": statement_id,
-                "category": cat,
-                "subcategory": sub,
-                "amount_usd": float(amt),
-            })
-    upserted = upsert_category_summaries(db, rows)
-
     # Return the same payload + statement_id so you can reference it later
     return SummaryResponse(
-        summary=summary,
-        uncategorized=round(uncategorized_total, 2),
-        transactions_count=len(transactions)
+        summary=run.summary,
+        uncategorized=round(run.uncategorized_total, 2),
+        transactions_count=run.row_count
     ).model_dump() | {  # add statement_id & upserted without touching your Pydantic model
         "statement_id": statement_id,
-        "rows_persisted": upserted
+        "rows_persisted": run.summaries_upserted
     }
 
 @router.post("/save")
 async def save(
     file: UploadFile = File(...),
     persist: bool = Query(True, description="Persist into SQLite (default: true)"),
+    background: bool = Query(False, description="Enqueue as a job; poll /statements/jobs/{statement_id}"),
     db: Session = Depends(get_db),
 ):
-    if not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Please upload a PDF")
+    check_upload(file.filename)
 
     contents = await file.read()
     statement_id = sha256_hex(contents)
-    txns = extract_transactions(contents)
-
-    rows_db = []
-    for t in txns:
-        cat, subcat = categorize_transactions(t["description"])
-        rows_db.append({
-            "statement_id": statement_id,
-            "date": t["date"],
-            "description": t["description"],
-            "amount": t["amount"],
-            "balance": t.get("balance"),
-            "category": cat,
-            "subcategory": subcat,
-            "source": "chase_pdf",
-        })
-
-    inserted = 0
-    if persist:
-        inserted = bulk_insert_transactions(db, rows_db)
 
-    return {
-        "message": "Data saved successfully",
-        "statement_id": statement_id,
-        "seen_rows": len(rows_db),
-        "inserted_rows": inserted,
-        "duplicates_skipped": len(rows_db) - inserted
-    }
+    if background:
+        job = await run_db(jobs.enqueue, db, statement_id, "save", contents, {"persist": persist})
+        return JSONResponse(job, status_code=202)
+
+    # Extract -> parse -> categorize -> persist transactions -> update summaries
+    run = IngestionRun(db, statement_id, contents, skip=save_skips(persist))
+    try:
+        await run.arun()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse statement: {e}")
+    return run.save_payload()
+
+@router.post("/import", summary="Bulk-import a CSV or OFX export (streamed, no PDF parsing)")
+async def import_export(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    check_upload(file.filename, streaming=True)
+    try:
+        return await run_db(import_statement, db, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to import statement: {e}")
+
+@router.get("/jobs/{statement_id}", summary="Progress and result of a background ingestion job")
+def job_status(
+    statement_id: str,
+    kind: str = Query("save", pattern="^(save|analyze)$"),
+    db: Session = Depends(get_db),
+):
+    job = jobs.get_job(db, statement_id, kind)
+    if not job:
+        raise HTTPException(status_code=404, detail="No job for this statement_id")
+    return job
 
 @router.get("/statements", summary="Get all saved statement_ids")
 def list_statement_ids(db: Session = Depends(get_db)):
@@ -114,4 +123,13 @@ def latest_statement_id(db: Session = Depends(get_db)):
     """)).fetchone()
     if not row or not row[0]:
         return {"message": "No statements found"}
-    return {"latest_statement_id": row[0]}
\ No newline at end of file
+    return {"latest_statement_id": row[0]}
+
+@router.get("/cache/stats", summary="Parse, merchant and emissions cache hit/miss counters, page triage totals")
+def cache_stats():
+    return {
+        "parse": get_parse_cache().stats(),
+        "page_triage": triage_stats(),
+        "merchant": merchant_cache.stats(),
+        "emissions": emissions_cache.stats(),
+    }
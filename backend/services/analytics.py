@@ -0,0 +1,172 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.emission_factors import factors_for
+from utils.lru import LRUCache
+from utils.text import normalize_merchant
+
+# Columnar in-memory copies of saved transactions for the dashboard. A frame
+# holds one statement (or every statement) as NumPy columns: int-coded
+# category / subcategory / merchant, float64 amounts and int32 YYYYMMDD dates.
+# Group-bys, top-N and emissions are then array ops instead of SQL round trips.
+# Frames are tagged with the statement_versions they were built from, so any
+# insert (which bumps the version) makes them stale; the LRU is bounded by
+# ANALYTICS_CACHE_BYTES of column data.
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+ANALYTICS_CACHE_BYTES = int(os.getenv("ANALYTICS_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+ALL_STATEMENTS = "*"
+
+class TransactionFrame:
+    def __init__(self, rows: List[Tuple], version: int):
+        self.version = version
+        n = len(rows)
+        categories: Dict[str, int] = {}
+        pairs: Dict[Tuple[str, str], int] = {}
+        merchants: Dict[str, int] = {}
+        keys: Dict[str, int] = {}   # description -> merchant code (normalize once)
+
+        self.category_codes = np.empty(n, dtype=np.int32)
+        self.pair_codes = np.empty(n, dtype=np.int32)
+        self.merchant_codes = np.empty(n, dtype=np.int32)
+        self.amounts = np.empty(n, dtype=np.float64)
+        self.dates = np.zeros(n, dtype=np.int32)
+        for i, (cat, sub, amount, posted_on, description) in enumerate(rows):
+            cat, sub = cat or "Uncategorized", sub or "Uncategorized"
+            self.category_codes[i] = categories.setdefault(cat, len(categories))
+            self.pair_codes[i] = pairs.setdefault((cat, sub), len(pairs))
+            code = keys.get(description)
+            if code is None:
+                code = keys[description] = merchants.setdefault(normalize_merchant(description or ""), len(merchants))
+            self.merchant_codes[i] = code
+            self.amounts[i] = amount or 0.0
+            if posted_on:
+                self.dates[i] = int(posted_on[:4] + posted_on[5:7] + posted_on[8:10])
+
+        self.categories = list(categories)
+        self.pairs = list(pairs)
+        self.merchants = list(merchants)
+        self.pair_categories = np.array([categories[c] for c, _ in self.pairs], dtype=np.int32)
+        self.spend = np.where(self.amounts < 0, -self.amounts, 0.0)
+        self._pair_factors: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.amounts.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.category_codes, self.pair_codes, self.merchant_codes, self.amounts, self.dates, self.spend)
+        names = sum(len(m) + 50 for m in self.merchants) + 100 * len(self.pairs)
+        return sum(a.nbytes for a in arrays) + names
+
+    def mask(self, start: Optional[int] = None, end: Optional[int] = None) -> Optional[np.ndarray]:
+        """Row mask for start <= date <= end (YYYYMMDD ints); None = all rows."""
+        if start is None and end is None:
+            return None
+        m = np.ones(len(self), dtype=bool)
+        if start is not None:
+            m &= self.dates >= start
+        if end is not None:
+            m &= self.dates <= end
+        return m
+
+    def emissions(self, mode: str = "mid") -> np.ndarray:
+        """kg CO2 per row (spend x factor of the row's subcategory)."""
+        factors = self._pair_factors.get(mode)
+        if factors is None:
+            factors = self._pair_factors[mode] = factors_for(
+                [c for c, _ in self.pairs], [s for _, s in self.pairs], mode=mode)
+        return self.spend * factors[self.pair_codes]
+
+def _group(codes: np.ndarray, n: int, mask: Optional[np.ndarray], *weights: np.ndarray) -> List[np.ndarray]:
+    if mask is not None:
+        codes = codes[mask]
+        weights = tuple(w[mask] for w in weights)
+    out = [np.bincount(codes, minlength=n).astype(np.int64)]
+    out += [np.bincount(codes, weights=w, minlength=n) for w in weights]
+    return out
+
+def totals(frame: TransactionFrame, mode: str = "mid", mask: Optional[np.ndarray] = None) -> Dict:
+    amounts, spend, kg, dates = frame.amounts, frame.spend, frame.emissions(mode), frame.dates
+    if mask is not None:
+        amounts, spend, kg, dates = amounts[mask], spend[mask], kg[mask], dates[mask]
+    dated = dates[dates > 0]
+    return {
+        "transactions": int(amounts.shape[0]),
+        "spend": round(float(spend.sum()), 2),
+        "income": round(float(amounts[amounts > 0].sum()), 2),
+        "emissions_kg": round(float(kg.sum()), 3),
+        "first_posted": _iso(int(dated.min())) if dated.size else None,
+        "last_posted": _iso(int(dated.max())) if dated.size else None,
+    }
+
+def category_breakdown(frame: TransactionFrame, mode: str = "mid", mask: Optional[np.ndarray] = None) -> Dict:
+    kg = frame.emissions(mode)
+    counts, spend, emissions = _group(frame.pair_codes, len(frame.pairs), mask, frame.spend, kg)
+    out: Dict[str, Dict] = {}
+    for i in np.flatnonzero(counts):
+        cat, sub = frame.pairs[i]
+        c = out.setdefault(cat, {"spend": 0.0, "emissions_kg": 0.0, "transactions": 0, "by_subcategory": {}})
+        c["spend"] += spend[i]
+        c["emissions_kg"] += emissions[i]
+        c["transactions"] += int(counts[i])
+        c["by_subcategory"][sub] = {
+            "spend": round(float(spend[i]), 2),
+            "emissions_kg": round(float(emissions[i]), 3),
+            "transactions": int(counts[i]),
+        }
+    for c in out.values():
+        c["spend"] = round(float(c["spend"]), 2)
+        c["emissions_kg"] = round(float(c["emissions_kg"]), 3)
+    return out
+
+def top_merchants(frame: TransactionFrame, limit: int = 10, mode: str = "mid",
+                  mask: Optional[np.ndarray] = None) -> List[Dict]:
+    """Merchants (normalize_merchant keys) with the highest spend."""
+    n = len(frame.merchants)
+    counts, spend, emissions = _group(frame.merchant_codes, n, mask, frame.spend, frame.emissions(mode))
+    k = min(limit, int(np.count_nonzero(spend)))
+    if k <= 0:
+        return []
+    top = np.argpartition(spend, -k)[-k:]
+    top = top[np.argsort(spend[top])[::-1]]
+    return [{
+        "merchant": frame.merchants[i],
+        "spend": round(float(spend[i]), 2),
+        "emissions_kg": round(float(emissions[i]), 3),
+        "transactions": int(counts[i]),
+    } for i in top]
+
+def _iso(yyyymmdd: int) -> str:
+    return f"{yyyymmdd // 10000:04d}-{yyyymmdd // 100 % 100:02d}-{yyyymmdd % 100:02d}"
+
+def _version(db: Session, statement_id: str) -> int:
+    """Current data version for a frame key (sum of all versions for ALL_STATEMENTS)."""
+    if statement_id == ALL_STATEMENTS:
+        sql, params = "SELECT COALESCE(SUM(version), 0) FROM statement_versions", {}
+    else:
+        sql, params = "SELECT COALESCE(MAX(version), 0) FROM statement_versions WHERE statement_id = :sid", {"sid": statement_id}
+    return int(db.execute(text(sql), params).scalar())
+
+def _load(db: Session, statement_id: str, version: int) -> TransactionFrame:
+    sql = "SELECT category, subcategory, amount, posted_on, description FROM transactions"
+    params = {}
+    if statement_id != ALL_STATEMENTS:
+        sql += " WHERE statement_id = :sid"
+        params = {"sid": statement_id}
+    return TransactionFrame(db.execute(text(sql), params).fetchall(), version)
+
+analytics_cache = LRUCache(ANALYTICS_CACHE_SIZE, maxbytes=ANALYTICS_CACHE_BYTES, weigh=lambda f: f.nbytes)
+
+def get_frame(db: Session, statement_id: str = ALL_STATEMENTS) -> TransactionFrame:
+    """Cached frame for a statement (or all statements), reloaded if its version moved."""
+    version = _version(db, statement_id)
+    frame = analytics_cache.get(statement_id)
+    if frame is None or frame.version != version:
+        frame = _load(db, statement_id, version)
+        analytics_cache.put(statement_id, frame)
+    return frame
@@ -1,6 +1,8 @@
+import os
 import re
-from typing import Dict, Tuple, List
-from models.schemas import Transaction
+from typing import Dict, Tuple, List, Optional
+from utils.lru import LRUCache
+from utils.text import normalize_merchant
 
 # ---- Categories & Subcategories ----
 RULES: List[Tuple[re.Pattern, str, str]] = [
@@ -63,38 +65,80 @@ RULES: List[Tuple[re.Pattern, str, str]] = [
     (re.compile(r"\b(church|temple|masjid)\b", re.I), "Charity", "Religious donations"),
 ]
 
+# ---- Compiled engine ----
+# Every rule is `\b(alt1|alt2|...)\b` and every alternative starts with a
+# literal keyword, so a rule can only match at a word start that begins with
+# one of its keyword prefixes. One scan over the word starts yields the
+# candidate rules; only those are searched, in RULES order, so first-rule-wins
+# (walmart/best buy/ikea/subway overlaps included) is unchanged.
+_QUANTIFIERS = "?*+{"
+_WORD_START_RE = re.compile(r"(?<!\w)\w")
+
+def _literal_prefix(alternative: str) -> str:
+    """Leading literal text of a regex alternative, e.g. "chick-?fil-?a" -> "chick"."""
+    out = []
+    for i, ch in enumerate(alternative):
+        if not (ch.isalnum() or ch in "&-' "):
+            break
+        if i + 1 < len(alternative) and alternative[i + 1] in _QUANTIFIERS:
+            break
+        out.append(ch)
+    return "".join(out).lower()
+
+class CategorizationEngine:
+    def __init__(self, rules: List[Tuple[re.Pattern, str, str]]):
+        self.rules = rules
+        # 2-char key -> [(keyword prefix, rule index)]
+        self.index: Dict[str, List[Tuple[str, int]]] = {}
+        # rules we can't index are searched for every description
+        self.always: List[int] = []
+
+        for i, (pattern, _, _) in enumerate(rules):
+            body = pattern.pattern
+            alternatives = body[3:-3].split("|") if body.startswith(r"\b(") and body.endswith(r")\b") else []
+            prefixes = [_literal_prefix(a) for a in alternatives]
+            if not prefixes or any(len(p) < 2 for p in prefixes) or "(" in body[3:-3]:
+                self.always.append(i)
+                continue
+            for p in set(prefixes):
+                self.index.setdefault(p[:2], []).append((p, i))
+
+    def match(self, desc: str) -> Optional[int]:
+        """Index of the first rule matching the lowercased description, or None."""
+        candidates = set(self.always)
+        index = self.index
+        for m in _WORD_START_RE.finditer(desc):
+            start = m.start()
+            entries = index.get(desc[start:start + 2])
+            if entries:
+                for prefix, i in entries:
+                    if desc.startswith(prefix, start):
+                        candidates.add(i)
+        for i in sorted(candidates):
+            if self.rules[i][0].search(desc):
+                return i
+        return None
+
+_ENGINE = CategorizationEngine(RULES)
+
 def categorize_transactions(description: str) -> Tuple[str, str]:
-    desc = description.lower()
-    for pattern, cat, sub in RULES:
-        if pattern.search(desc):
-            return cat, sub
-    return "Uncategorized", "Uncategorized"
-
-def summarize_transactions(transactions: List[Transaction]):
-    """
-    Aggregate NEGATIVE amounts (spend) by Category/Subcategory.
-    Positive amounts (deposits/refunds) are ignored for the spend summary.
-    """
-    summary: Dict[str, Dict[str, float]] = {}
-    uncategorized_total = 0.0
-
-    for t in transactions:
-        amt = t.amount
-        if amt >= 0:
-            continue  # ignore deposits/income for spend summary
-
-        cat, sub = categorize_transactions(t.description)
-        if cat == "Uncategorized":
-            uncategorized_total += abs(amt)
-            continue
-
-        summary.setdefault(cat, {})
-        summary[cat].setdefault(sub, 0.0)
-        summary[cat][sub] += abs(amt)
-
-    # round to 2 decimals
-    for cat in list(summary.keys()):
-        for sub in list(summary[cat].keys()):
-            summary[cat][sub] = round(summary[cat][sub], 2)
-
-    return summary, uncategorized_total
\ No newline at end of file
+    i = _ENGINE.match(description.lower())
+    if i is None:
+        return "Uncategorized", "Uncategorized"
+    _, cat, sub = RULES[i]
+    return cat, sub
+
+# ---- Merchant cache ----
+# (category, subcategory) per normalized merchant key, shared by every caller of
+# categorize_merchant so repeat merchants skip rule evaluation entirely.
+MERCHANT_CACHE_SIZE = int(os.getenv("MERCHANT_CACHE_SIZE", "10000"))
+merchant_cache = LRUCache(MERCHANT_CACHE_SIZE)
+
+def categorize_merchant(description: str) -> Tuple[str, str]:
+    """categorize_transactions() memoized on normalize_merchant(description)."""
+    key = normalize_merchant(description)
+    result = merchant_cache.get(key)
+    if result is None:
+        result = categorize_transactions(key)
+        merchant_cache.put(key, result)
+    return result
@@ -0,0 +1,101 @@
+import csv
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.text import date_keys, parse_signed_amount
+
+# Bank CSV exports (Chase, most US banks, Mint-style). Columns are matched by
+# header name, first alias wins; a file needs a date, a description and either
+# an amount or debit/credit columns. Rows stream straight from the text lines,
+# so an export is never held in memory as a whole.
+#   Chase checking: Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #
+#   Chase card:     Transaction Date,Post Date,Description,Category,Type,Amount,Memo
+COLUMN_ALIASES = {
+    "date": ("posting date", "post date", "posted date", "transaction date", "trans. date", "date"),
+    "description": ("description", "payee", "merchant", "name", "memo", "details"),
+    "amount": ("amount", "transaction amount", "amount (usd)"),
+    "debit": ("debit", "withdrawal", "withdrawals", "debit amount"),
+    "credit": ("credit", "deposit", "deposits", "credit amount"),
+    "balance": ("balance", "running bal.", "running balance"),
+}
+DELIMITERS = (",", ";", "\t", "|")
+
+def header_columns(fields: Iterable[str]) -> Optional[Dict[str, int]]:
+    """{role: column index} for a header row, or None if it isn't a transactions export."""
+    names = [f.strip().strip('"').lower() for f in fields]
+    cols: Dict[str, int] = {}
+    for role, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                cols[role] = names.index(alias)
+                break
+    if "date" not in cols or "description" not in cols:
+        return None
+    if "amount" not in cols and "debit" not in cols and "credit" not in cols:
+        return None
+    return cols
+
+def sniff_dialect(header_line: str) -> Optional[str]:
+    """Delimiter whose split of `header_line` maps to transaction columns, if any."""
+    for delimiter in DELIMITERS:
+        if delimiter in header_line:
+            fields = next(csv.reader([header_line], delimiter=delimiter), [])
+            if header_columns(fields):
+                return delimiter
+    return None
+
+def _first_line(lines: Iterator[str]) -> Optional[str]:
+    for line in lines:
+        if line.strip():
+            return line
+    return None
+
+def _field(fields: List[str], i: Optional[int]) -> str:
+    return fields[i] if i is not None and i < len(fields) else ""
+
+def _row(fields: List[str], cols: Dict[str, int]) -> Optional[Dict]:
+    day = date_keys(_field(fields, cols["date"]).strip())
+    description = " ".join(_field(fields, cols["description"]).split())
+    if day is None or not description:
+        return None
+    try:
+        if "amount" in cols:
+            amount = parse_signed_amount(_field(fields, cols["amount"]))
+        else:
+            amount = (abs(parse_signed_amount(_field(fields, cols.get("credit"))))
+                      - abs(parse_signed_amount(_field(fields, cols.get("debit")))))
+        balance = _field(fields, cols.get("balance")).strip()
+        balance = parse_signed_amount(balance) if balance else None
+    except ValueError:
+        return None
+    return {
+        "date": day[0],
+        "description": description,
+        "amount": round(amount, 2),
+        "balance": balance,
+        "posted_on": day[1],
+    }
+
+def iter_csv_transactions(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    Transaction dicts ({date: MM/DD, description, amount, balance, posted_on})
+    from the lines of a CSV export; blank, footer and unparseable rows are
+    skipped. Raises ValueError if the header isn't recognised.
+    """
+    lines = iter(lines)
+    header = _first_line(lines)
+    delimiter = sniff_dialect(header) if header else None
+    if delimiter is None:
+        raise ValueError("CSV header has no date/description/amount columns")
+    cols = header_columns(next(csv.reader([header], delimiter=delimiter)))
+
+    skipped = 0
+    for fields in csv.reader(lines, delimiter=delimiter):
+        if not any(f.strip() for f in fields):
+            continue
+        row = _row(fields, cols)
+        if row is None:
+            skipped += 1
+            continue
+        yield row
+    if skipped:
+        print(f"⚠️ CSV: skipped {skipped} unparseable rows")
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from db.database import DB_DIR
+from utils.lru import LRUCache
+
+# Query embeddings keyed by sha256(model_id + text). Hot vectors live in an
+# in-memory LRU; every vector is also stored as a float32 blob in a small SQLite
+# file under data/ so identical queries skip the remote embedding call across
+# restarts and workers. Entries expire after EMBEDDING_CACHE_TTL seconds and the
+# store is trimmed to EMBEDDING_CACHE_MAX_ENTRIES (least recently used first).
+# The row count is tracked in memory (counted once at startup, +1 per put), so
+# the store is only counted again when that estimate crosses the bound; a trim
+# then goes down to TRIM_TO of the bound so the next one is ~10% of puts away.
+EMBEDDING_CACHE_PATH = os.path.join(DB_DIR, "embeddings.db")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+TRIM_TO = 0.9
+
+EmbedFn = Callable[[str], Sequence[float]]
+
+def embedding_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        path: str = EMBEDDING_CACHE_PATH,
+        maxsize: int = EMBEDDING_CACHE_SIZE,
+        ttl: float = EMBEDDING_CACHE_TTL,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        """`path` may be ":memory:" for a throwaway store."""
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.memory = LRUCache(maxsize)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model_id TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        (self._stored,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def _fresh(self, created_at: float) -> bool:
+        return self.ttl <= 0 or self._clock() - created_at < self.ttl
+
+    def get(self, model_id: str, text: str) -> Optional[np.ndarray]:
+        key = embedding_key(model_id, text)
+        entry = self.memory.get(key)
+        if entry is not None:
+            vec, created_at = entry
+            if self._fresh(created_at):
+                with self._lock:
+                    self.hits += 1
+                return vec
+            self.memory.pop(key)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dim, vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and not self._fresh(row[2]):
+                self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self.expired += 1
+                self._stored -= 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (self._clock(), key))
+            self.hits += 1
+            self.disk_hits += 1
+
+        dim, blob, created_at = row
+        vec = np.frombuffer(blob, dtype=np.float32, count=dim)
+        self.memory.put(key, (vec, created_at))
+        return vec
+
+    def put(self, model_id: str, text: str, vector: Sequence[float]) -> np.ndarray:
+        key = embedding_key(model_id, text)
+        vec = np.ascontiguousarray(vector, dtype=np.float32)
+        vec.setflags(write=False)
+        now = self._clock()
+        self.memory.put(key, (vec, now))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model_id, dim, vector, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, int(vec.shape[0]), vec.tobytes(), now, now),
+            )
+            self._stored += 1  # over-counts replacements; _trim recounts
+            if self._stored > self.max_entries:
+                self._trim()
+        return vec
+
+    def _trim(self) -> None:
+        """Evict least recently used rows down to TRIM_TO of max_entries (call with _lock held)."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - int(self.max_entries * TRIM_TO) if count > self.max_entries else 0
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
+        self._stored = count - excess
+
+    def purge_expired(self) -> int:
+        if self.ttl <= 0:
+            return 0
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM embeddings WHERE created_at <= ?", (self._clock() - self.ttl,))
+            self.expired += cur.rowcount
+            self._stored -= cur.rowcount
+        return cur.rowcount
+
+    def clear(self) -> None:
+        self.memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._stored = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            (stored,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "stored": stored,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory": self.memory.stats(),
+        }
@@ -1,3 +1,7 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
 # Midpoint factors per subcategory (kg CO2 per USD).
 # For ranges like 0.15–0.25 we use mid = (min+max)/2.
 EMISSION_FACTORS = {
@@ -51,23 +55,56 @@ EMISSION_FACTORS = {
     ("Charity", "Religious donations"): (0.01, 0.05),
 }
 
+# ---- Precomputed lookup table ----
+# Built once at import: one row per known (category, subcategory) with columns
+# min/mid/max, plus a fallback row for unknown pairs and a zero row for
+# electricity. Lookups and emissions for many rows become array indexing.
+MODES = ("min", "mid", "max")
+MODE_INDEX = {m: i for i, m in enumerate(MODES)}   # anything else -> mid
+DEFAULT_RANGE = (0.05, 0.20)
+
+FALLBACK_ID = 0
+ELECTRICITY_ID = 1
+
+def _row(lo: float, hi: float) -> Tuple[float, float, float]:
+    return (lo, (lo + hi) / 2.0, hi)
+
+def _is_electricity(category: str, subcategory: str) -> bool:
+    return category == "Housing" and subcategory.lower().startswith("electricity")
+
+FACTOR_INDEX: Dict[Tuple[str, str], int] = {}
+_rows = [_row(*DEFAULT_RANGE), (0.0, 0.0, 0.0)]
+for _key, (_lo, _hi) in EMISSION_FACTORS.items():
+    if _is_electricity(*_key):
+        FACTOR_INDEX[_key] = ELECTRICITY_ID
+        continue
+    FACTOR_INDEX[_key] = len(_rows)
+    _rows.append(_row(_lo, _hi))
+FACTOR_INDEX[("Housing", "Electricity (grid-specific carbon intensity)")] = ELECTRICITY_ID
+FACTOR_TABLE = np.array(_rows, dtype=np.float64)
+FACTOR_TABLE.setflags(write=False)
+
+# Per-category average of the subcategory factors (electricity excluded).
+CATEGORY_FACTORS: Dict[str, Tuple[float, float, float]] = {}
+for _cat in {c for c, _ in EMISSION_FACTORS}:
+    _ids = [i for (c, _), i in FACTOR_INDEX.items() if c == _cat and i != ELECTRICITY_ID]
+    if _ids:
+        CATEGORY_FACTORS[_cat] = tuple(sum(_rows[i][m] for i in _ids) / len(_ids) for m in range(3))
+CATEGORY_FALLBACK = (0.05 + 0.20) / 2.0  # 0.125 kg/USD, any mode
+
+def factor_id(category: str, subcategory: str) -> int:
+    """Row of FACTOR_TABLE for a (category, subcategory) pair."""
+    i = FACTOR_INDEX.get((category, subcategory))
+    if i is None:
+        i = ELECTRICITY_ID if _is_electricity(category, subcategory) else FALLBACK_ID
+    return i
+
 def factor_for(category: str, subcategory: str, mode: str = "mid") -> float:
     """
     mode: 'min' | 'max' | 'mid'
     For Electricity, return 0 and let caller handle region-specific intensity.
     """
-    if category == "Housing" and subcategory.lower().startswith("electricity"):
-        return 0.0
-    rng = EMISSION_FACTORS.get((category, subcategory))
-    if not rng:
-        lo, hi = (0.05, 0.20)
-    else:
-        lo, hi = rng
-    if mode == "min":
-        return lo
-    if mode == "max":
-        return hi
-    return (lo + hi) / 2.0
+    return float(FACTOR_TABLE[factor_id(category, subcategory), MODE_INDEX.get(mode, 1)])
 
 def get_emission_factor(category: str, subcategory: str, mode: str = "mid") -> float:
     """
@@ -81,42 +118,31 @@ def get_emission_factor(category: str, subcategory: str, mode: str = "mid") -> f
     Returns:
         float: kg CO₂ per USD
     """
-    # Electricity is special (region-specific) → return 0, caller handles it
-    if category == "Housing" and subcategory.lower().startswith("electricity"):
-        return 0.0
-
-    rng = EMISSION_FACTORS.get((category, subcategory))
-    if not rng:
-        # fallback if missing → generic factor
-        lo, hi = (0.05, 0.20)
-    else:
-        lo, hi = rng
-
-    if mode == "min":
-        return lo
-    if mode == "max":
-        return hi
-    return (lo + hi) / 2.0
-
-
-# services/emission_factors.py
-from typing import Dict, Tuple
-# keep your existing EMISSION_FACTORS and factor_for(...)
+    # Electricity is special (region-specific) → 0, caller handles it;
+    # unknown pairs fall back to a generic factor.
+    return factor_for(category, subcategory, mode=mode)
 
 def category_factor(category: str, mode: str = "mid") -> float:
     """
     Average the subcategory factors for a given category.
     Used to convert category-level dollar budgets into emissions budgets (kg/USD).
     """
-    vals = []
-    for (cat, sub) in EMISSION_FACTORS.keys():
-        if cat != category:
-            continue
-        # Electricity is handled elsewhere; skip here
-        if cat == "Housing" and sub.lower().startswith("electricity"):
-            continue
-        vals.append(factor_for(cat, sub, mode=mode))
-    if not vals:
+    vals = CATEGORY_FACTORS.get(category)
+    if vals is None:
         # sensible fallback if category has no sub-factors listed
-        return (0.05 + 0.20) / 2.0  # 0.125 kg/USD mid
-    return sum(vals) / len(vals)
\ No newline at end of file
+        return CATEGORY_FALLBACK
+    return vals[MODE_INDEX.get(mode, 1)]
+
+def factors_for(categories: Sequence[str], subcategories: Sequence[str], mode: str = "mid") -> np.ndarray:
+    """Vector of kg/USD factors for parallel category/subcategory sequences."""
+    ids = np.fromiter((factor_id(c, s) for c, s in zip(categories, subcategories)),
+                      dtype=np.intp, count=len(categories))
+    return FACTOR_TABLE[ids, MODE_INDEX.get(mode, 1)]
+
+def category_factors_for(categories: Sequence[str], mode: str = "mid") -> np.ndarray:
+    """Vector of category_factor() values."""
+    return np.fromiter((category_factor(c, mode) for c in categories), dtype=np.float64, count=len(categories))
+
+def emissions_for(categories: Sequence[str], subcategories: Sequence[str], amounts, mode: str = "mid") -> np.ndarray:
+    """kg CO2 for each (category, subcategory, USD amount) row, in one vectorized pass."""
+    return np.asarray(amounts, dtype=np.float64) * factors_for(categories, subcategories, mode)
@@ -1,48 +1,175 @@
-from typing import Dict, Tuple
+import os
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from services.emission_factors import factor_for
+from sqlalchemy import bindparam, text
+from services.emission_factors import emissions_for
+from services.repository import get_statement_aggregates, get_statement_version, TOTAL_KEY
+from utils.lru import LRUCache
 
-def aggregate_spend_by_subcategory(db: Session, statement_id: str) -> Dict[Tuple[str, str], float]:
-    """
-    Returns absolute spend per (category, subcategory) for a given statement_id.
-    Only expenses (negative amounts) are counted toward spend.
-    """
-    rows = db.execute(text("""
-        SELECT category, subcategory, SUM(ABS(CASE WHEN amount < 0 THEN amount ELSE 0 END)) as spend
-        FROM transactions
-        WHERE statement_id = :sid
-        GROUP BY category, subcategory
-    """), {"sid": statement_id}).fetchall()
-
-    out: Dict[Tuple[str, str], float] = {}
-    for cat, sub, spend in rows:
-        out[(cat, sub)] = float(spend or 0.0)
-    return out
+# /emissions/categorize results keyed by (statement_id, mode) and tagged with the
+# statement version they were computed from; a version bump (summaries upsert)
+# makes the entry stale.
+EMISSIONS_CACHE_SIZE = int(os.getenv("EMISSIONS_CACHE_SIZE", "256"))
+emissions_cache = LRUCache(EMISSIONS_CACHE_SIZE)
 
-def compute_emissions_from_summary(db: Session, statement_id: str, mode: str = "mid") -> Dict:
-    rows = db.execute(text("""
-        SELECT category, subcategory, amount_usd
-        FROM category_summaries
-        WHERE statement_id = :sid
-    """), {"sid": statement_id}).fetchall()
+def spend_summary(db: Session, statement_id: str, mode: str = "mid") -> Optional[Dict]:
+    """Saved-transaction spend, counts and emissions for a statement, or None if nothing was saved."""
+    rows = get_statement_aggregates(db, statement_id)
+    totals = next((r for r in rows if r[0] == TOTAL_KEY), None)
+    if totals is None:
+        return None
+    rows = [r for r in rows if r[0] != TOTAL_KEY]
+    kg = emissions_for([r[0] for r in rows], [r[1] for r in rows], [float(r[2]) for r in rows], mode=mode)
+
+    by_category: Dict[str, Dict[str, Dict]] = {}
+    for (cat, sub, spend, count), v in zip(rows, kg.tolist()):
+        by_category.setdefault(cat, {})[sub] = {
+            "spend": round(spend, 2),
+            "transactions": count,
+            "emission": round(v, 3),
+        }
+    return {
+        "statement_id": statement_id,
+        "mode": mode,
+        "total_spend": round(totals[2], 2),
+        "transactions_count": totals[3],
+        "total_emissions_kg": round(float(kg.sum()), 3),
+        "by_category": by_category,
+    }
+
+# A statement's summaries plus its version (0 for summaries written before
+# statement_versions existed) in one round trip.
+SUMMARIES_WITH_VERSION_SQL = text("""
+    SELECT cs.category, cs.subcategory, cs.amount_usd, COALESCE(v.version, 0)
+    FROM category_summaries cs
+    LEFT JOIN statement_versions v ON v.statement_id = cs.statement_id
+    WHERE cs.statement_id = :sid
+""")
 
+def _emissions_payload(statement_id: str, mode: str, rows: List) -> Dict:
     if not rows:
         return {"statement_id": statement_id, "total_emissions_kg": 0.0, "by_category": {}}
 
-    out: Dict[str, Dict[str, float]] = {}
-    total = 0.0
+    # USD is already a positive total per subcategory; one table lookup + multiply
+    cats = [r[0] for r in rows]
+    subs = [r[1] for r in rows]
+    kg = emissions_for(cats, subs, [float(r[2] or 0.0) for r in rows], mode=mode)
 
-    for cat, sub, usd in rows:
-        # USD is already a positive total per subcategory
-        f = factor_for(cat, sub, mode=mode)  # kg per USD
-        kg = float(usd or 0.0) * f
-        out.setdefault(cat, {})[sub] = round(kg, 3)
-        total += kg
+    out: Dict[str, Dict[str, float]] = {}
+    for cat, sub, v in zip(cats, subs, kg.tolist()):
+        out.setdefault(cat, {})[sub] = round(v, 3)
+    total = float(kg.sum())
 
     return {
         "statement_id": statement_id,
         "mode": mode,
         "total_emissions_kg": round(total, 3),
         "by_category": out
-    }
\ No newline at end of file
+    }
+
+def compute_emissions_from_summary(db: Session, statement_id: str, mode: str = "mid") -> Dict:
+    rows = db.execute(SUMMARIES_WITH_VERSION_SQL, {"sid": statement_id}).fetchall()
+    return _emissions_payload(statement_id, mode, rows)
+
+def emissions_etag(statement_id: str, mode: str, version: int) -> str:
+    return f'"{statement_id[:16]}-{mode}-v{version}"'
+
+def cached_emissions(db: Session, statement_id: str, mode: str = "mid") -> Optional[Tuple[str, Dict]]:
+    """
+    (etag, payload) for a statement, or None if it has no summaries.
+    A cache hit costs a single statement_versions lookup; a miss is one query
+    for the summaries and their version together.
+    """
+    key = (statement_id, mode)
+    entry = emissions_cache.get(key)
+    if entry is not None:
+        # Summaries written before statement_versions existed have no row: version 0.
+        version = get_statement_version(db, statement_id) or 0
+        if entry[0] == version:
+            return emissions_etag(statement_id, mode, version), entry[1]
+
+    rows = db.execute(SUMMARIES_WITH_VERSION_SQL, {"sid": statement_id}).fetchall()
+    if not rows:
+        return None
+    version = rows[0][3]
+    payload = _emissions_payload(statement_id, mode, rows)
+    emissions_cache.put(key, (version, payload))
+    return emissions_etag(statement_id, mode, version), payload
+
+
+# Cross-statement spend/emissions by month and category for a posted_on range.
+# The range predicate seeks ix_txn_posted_cat_sub (posted_on, category,
+# subcategory, amount), which also covers every column the query reads.
+RANGE_SQL = """
+    SELECT substr(posted_on, 1, 7) AS month, category, subcategory,
+           SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS spend, COUNT(*) AS n
+    FROM transactions
+    WHERE posted_on >= :start AND posted_on <= :end{statement_filter}
+    GROUP BY month, category, subcategory
+"""
+RANGE_QUERY = text(RANGE_SQL.format(statement_filter=""))
+RANGE_QUERY_FOR_STATEMENTS = text(
+    RANGE_SQL.format(statement_filter=" AND statement_id IN :statement_ids")
+).bindparams(bindparam("statement_ids", expanding=True))
+
+def _bucket() -> Dict:
+    return {"spend": 0.0, "emissions_kg": 0.0, "transactions": 0}
+
+def _add(bucket: Dict, spend: float, kg: float, n: int) -> None:
+    bucket["spend"] += spend
+    bucket["emissions_kg"] += kg
+    bucket["transactions"] += n
+
+def _rounded(bucket: Dict) -> Dict:
+    out = dict(bucket)
+    out["spend"] = round(bucket["spend"], 2)
+    out["emissions_kg"] = round(bucket["emissions_kg"], 3)
+    return out
+
+def range_summary(
+    db: Session,
+    start: str,
+    end: str,
+    mode: str = "mid",
+    statement_ids: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Spend and emissions per month and per category for transactions posted
+    between `start` and `end` (inclusive ISO dates), across all statements or
+    just `statement_ids`. One grouped query; emissions are computed vectorized.
+    """
+    params = {"start": start, "end": end}
+    if statement_ids:
+        rows = db.execute(RANGE_QUERY_FOR_STATEMENTS, {**params, "statement_ids": list(statement_ids)}).fetchall()
+    else:
+        rows = db.execute(RANGE_QUERY, params).fetchall()
+
+    kg = emissions_for([r[1] for r in rows], [r[2] for r in rows], [float(r[3] or 0.0) for r in rows], mode=mode)
+
+    totals = _bucket()
+    by_month: Dict[str, Dict] = {}
+    by_category: Dict[str, Dict] = {}
+    for (month, cat, sub, spend, n), v in zip(rows, kg.tolist()):
+        spend = float(spend or 0.0)
+        _add(totals, spend, v, n)
+        m = by_month.setdefault(month, {**_bucket(), "by_category": {}})
+        _add(m, spend, v, n)
+        _add(m["by_category"].setdefault(cat, _bucket()), spend, v, n)
+        c = by_category.setdefault(cat, {**_bucket(), "by_subcategory": {}})
+        _add(c, spend, v, n)
+        _add(c["by_subcategory"].setdefault(sub, _bucket()), spend, v, n)
+
+    return {
+        "start": start,
+        "end": end,
+        "mode": mode,
+        "totals": _rounded(totals),
+        "by_month": {
+            month: {**_rounded(m), "by_category": {k: _rounded(b) for k, b in m["by_category"].items()}}
+            for month, m in sorted(by_month.items())
+        },
+        "by_category": {
+            cat: {**_rounded(c), "by_subcategory": {k: _rounded(b) for k, b in c["by_subcategory"].items()}}
+            for cat, c in by_category.items()
+        },
+    }
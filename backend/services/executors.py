@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Execution lanes that keep blocking work off the asyncio event loop:
+#   cpu   - process pool for CPU-bound PDF page parsing
+#   parse - threads that orchestrate a parse (cache lookup, wait on cpu futures)
+#   db    - threads for blocking SQLAlchemy calls
+#   jobs  - background ingestion job workers (services/jobs.py)
+#   net   - blocking network clients (Bedrock embeddings, Qdrant search)
+#   embed - embedding batches fanned out by get_embeddings (kept separate from
+#           net so a net task waiting on its batches can't starve them)
+# Each lane's concurrency limit is its worker count; anything beyond that
+# waits in the executor queue and shows up as queue depth in stats().
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+PARSE_CONCURRENCY = int(os.getenv("PARSE_CONCURRENCY", "4"))
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", "8"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+NET_CONCURRENCY = int(os.getenv("NET_CONCURRENCY", "8"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+class Lane:
+    def __init__(self, name: str, factory: Callable[[int], Executor], limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_pending = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._factory(self.limit)
+            return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    def _done(self, fut: Future) -> None:
+        with self._lock:
+            if fut.cancelled() or fut.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        fut = self.executor.submit(fn, *args)
+        with self._lock:
+            self.submitted += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        fut.add_done_callback(self._done)
+        return fut
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        pending = self.pending
+        active = min(pending, self.limit)
+        return {
+            "limit": self.limit,
+            "active": active,
+            "queued": pending - active,
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+# forkserver, not fork: a worker forked while another thread holds a lock
+# (e.g. pdf_parser._pdfium_lock) would inherit it held and deadlock.
+cpu_lane = Lane("cpu", lambda n: ProcessPoolExecutor(
+    max_workers=n, mp_context=multiprocessing.get_context("forkserver")), CPU_WORKERS)
+parse_lane = Lane("parse", lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="parse"), PARSE_CONCURRENCY)
+db_lane = Lane("db", lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="db"), DB_CONCURRENCY)
+job_lane = Lane("jobs", lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="job"), JOB_WORKERS)
+net_lane = Lane("net", lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="net"), NET_CONCURRENCY)
+embed_lane = Lane("embed", lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="embed"), EMBED_CONCURRENCY)
+
+LANES = (cpu_lane, parse_lane, db_lane, job_lane, net_lane, embed_lane)
+
+async def run_parse(fn: Callable, *args: Any) -> Any:
+    """Run a (cached) statement parse without blocking the event loop."""
+    return await parse_lane.run(fn, *args)
+
+async def run_db(fn: Callable, *args: Any) -> Any:
+    """Run a blocking SQLAlchemy call on the bounded DB thread pool."""
+    return await db_lane.run(fn, *args)
+
+async def run_net(fn: Callable, *args: Any) -> Any:
+    """Run a blocking network call (embedding, vector search) on the net pool."""
+    return await net_lane.run(fn, *args)
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {lane.name: lane.stats() for lane in LANES}
+
+def shutdown() -> None:
+    for lane in LANES:
+        lane.shutdown()
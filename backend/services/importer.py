@@ -0,0 +1,140 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from services.executors import parse_lane
+from services.ingestion import SpendSummary, save_response, summary_rows, transaction_rows
+from services.parsers import SNIFF_BYTES, detect
+from services.repository import stream_insert_transactions, upsert_category_summaries
+
+# Bulk import of CSV/OFX exports (/statements/import), with no PDF parsing.
+# The (spooled) upload is read twice, never whole:
+#   1. sha256 in IMPORT_CHUNK_BYTES chunks -> statement_id, so re-importing a
+#      file dedupes on uq_txn_key exactly like /statements/save;
+#   2. the parser streams rows through an incremental text decoder; each batch
+#      of IMPORT_BATCH_SIZE rows is categorized (one RULES lookup per distinct
+#      description) and inserted through stream_insert_transactions in
+#      uq_txn_key order.
+# Parsing runs on the parse lane up to IMPORT_PREFETCH batches ahead of the
+# inserts (sqlite3 releases the GIL while it writes, so the two overlap);
+# at most IMPORT_PREFETCH + 1 batches of rows are in memory at a time.
+IMPORT_CHUNK_BYTES = int(os.getenv("IMPORT_CHUNK_BYTES", str(1 << 20)))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "20000"))
+IMPORT_PREFETCH = int(os.getenv("IMPORT_PREFETCH", "2"))
+
+def sha256_file(f: BinaryIO, chunk_size: int = IMPORT_CHUNK_BYTES) -> str:
+    """Hex sha256 of `f` from its current position to EOF, read in chunks (position restored)."""
+    pos = f.tell()
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        h.update(chunk)
+    f.seek(pos)
+    return h.hexdigest()
+
+def _categorized_batches(
+    statement_id: str,
+    source: str,
+    txns: Iterable[Dict],
+    spend: SpendSummary,
+    batch_size: int,
+) -> Iterator[List[Dict]]:
+    it = iter(txns)
+    while True:
+        batch = transaction_rows(statement_id, islice(it, batch_size), source)
+        if not batch:
+            return
+        yield spend.add(batch)
+
+_DONE = object()
+
+def _prefetched(batches: Iterator[List[Dict]], depth: int) -> Iterator[Dict]:
+    """
+    Rows of `batches`, produced on the parse lane while the caller consumes.
+    Producer errors are re-raised here; closing the generator stops the producer.
+    """
+    if depth <= 0:
+        for batch in batches:
+            yield from batch
+        return
+    ready: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for batch in batches:
+                if not put(batch):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    producer = parse_lane.submit(produce)
+    try:
+        while True:
+            item = ready.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        stop.set()
+        producer.result()
+
+def import_statement(db: Session, f: BinaryIO, batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    """
+    Import a CSV/OFX export from a binary file object. Returns the
+    /statements/save payload plus parser, summary and timing fields.
+    Raises ValueError (UnsupportedStatement) for anything that can't stream,
+    including PDFs.
+    """
+    t0 = time.perf_counter()
+    head = f.read(SNIFF_BYTES)
+    f.seek(0)
+    parser = detect(head, streaming=True)
+    statement_id = sha256_file(f)
+    t_hash = time.perf_counter()
+
+    spend = SpendSummary()
+    batches = _categorized_batches(statement_id, parser.name, parser.stream(f), spend, batch_size)
+    rows = _prefetched(batches, IMPORT_PREFETCH)
+    report = stream_insert_transactions(
+        db, rows, batch_size=batch_size, sort_batches=True, on_failed=spend.remove)
+    t_insert = time.perf_counter()
+
+    summary = spend.summary()
+    upserted = upsert_category_summaries(db, summary_rows(statement_id, summary))
+    t_end = time.perf_counter()
+
+    elapsed = t_end - t0
+    print(f"📥 Imported {report['seen']} {parser.name} rows ({report['inserted']} new) "
+          f"in {elapsed * 1000:.0f}ms, {report['seen'] / elapsed:,.0f} rows/s")
+    out = save_response(statement_id, report["seen"], report)
+    out.update({
+        "parser": parser.name,
+        "summaries_upserted": upserted,
+        "summary": summary,
+        "uncategorized": round(spend.uncategorized_total, 2),
+        "timings_ms": {
+            "hash": round((t_hash - t0) * 1000, 1),
+            "parse_categorize_insert": round((t_insert - t_hash) * 1000, 1),
+            "summaries": round((t_end - t_insert) * 1000, 1),
+        },
+        "rows_per_sec": round(report["seen"] / elapsed) if elapsed > 0 else None,
+    })
+    return out
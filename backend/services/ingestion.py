@@ -0,0 +1,188 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.categorizer import categorize_merchant
+from services.emission_factors import factors_for, category_factors_for
+from utils.text import posted_on
+
+# Building blocks for the statement ingestion pipeline (services/pipeline.py):
+# row shaping, categorization + spend summary, and the response payloads.
+
+def summary_rows(statement_id: str, summary: Dict[str, Dict[str, float]]) -> List[Dict]:
+    """Flatten {category: {subcategory: usd}} into category_summaries rows."""
+    rows = []
+    for cat, subs in summary.items():
+        for sub, amt in subs.items():
+            rows.append({
+                "statement_id": statement_id,
+                "category": cat,
+                "subcategory": sub,
+                "amount_usd": float(amt),
+            })
+    return rows
+
+def period_dates(period: Dict[str, str]) -> Tuple[date, date]:
+    """{"start", "end"} ISO period (StatementParser.period) -> (start, end) dates."""
+    return date.fromisoformat(period["start"]), date.fromisoformat(period["end"])
+
+def transaction_rows(
+    statement_id: str,
+    txns: Iterable[Dict],
+    source: str,
+    period: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """
+    Extracted transactions as `transactions` table rows (not yet categorized).
+    Rows without their own posted_on are dated from `period` ({"start", "end"},
+    see StatementParser.period); `source` is the parser name.
+    """
+    dates = period_dates(period) if period else None
+    return [{
+        "statement_id": statement_id,
+        "date": t["date"],
+        "description": t["description"],
+        "amount": t["amount"],
+        "balance": t.get("balance"),
+        "source": source,
+        "posted_on": t.get("posted_on") or posted_on(t["date"], dates),
+    } for t in txns]
+
+class SpendSummary:
+    """
+    Categorizes rows batch by batch and accumulates the spend summary:
+    NEGATIVE amounts by Category/Subcategory, with Uncategorized spend totalled
+    separately. Positive amounts (deposits/refunds) are ignored.
+    """
+
+    def __init__(self):
+        self._spend: Dict[Tuple[str, str], float] = {}
+        self.uncategorized_total = 0.0
+
+    def add(self, rows: List[Dict]) -> List[Dict]:
+        """Set category/subcategory on each row (in place); each distinct description is categorized once."""
+        cats = {d: categorize_merchant(d) for d in {r["description"] for r in rows}}
+        for r in rows:
+            r["category"], r["subcategory"] = cats[r["description"]]
+        self._fold(rows, 1.0)
+        return rows
+
+    def remove(self, rows: List[Dict]) -> None:
+        """Take already categorized rows (e.g. a batch that failed to insert) back out."""
+        self._fold(rows, -1.0)
+
+    def _fold(self, rows: List[Dict], sign: float) -> None:
+        spend = self._spend
+        for r in rows:
+            amt = r["amount"]
+            if amt >= 0:
+                continue
+            if r["category"] == "Uncategorized":
+                self.uncategorized_total -= sign * amt
+            else:
+                key = r["category"], r["subcategory"]
+                spend[key] = spend.get(key, 0.0) - sign * amt
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for (cat, sub), amt in self._spend.items():
+            amt = round(amt, 2)
+            if amt:  # 0 once every row of it was removed
+                out.setdefault(cat, {})[sub] = amt
+        return out
+
+def save_response(statement_id: str, seen: int, report: Optional[Dict] = None) -> Dict:
+    """/statements/save payload; `report` is the stream_insert_transactions report when persisted."""
+    inserted = report["inserted"] if report else 0
+    out = {
+        "message": "Data saved successfully",
+        "statement_id": statement_id,
+        "seen_rows": seen,
+        "inserted_rows": inserted,
+        "duplicates_skipped": seen - inserted
+    }
+    if report:
+        out["failed_rows"] = report["failed"]
+        out["batches"] = report["batches"]
+    return out
+
+def budget_allocation_dollars() -> dict:
+    """
+    Mirrors /user/profile allocation (in dollars).
+    If you later make /user/profile dynamic, import from a service
+    instead of hardcoding this.
+    """
+    monthly_income = 2000
+    percentages = {
+        "Travel": 10,
+        "Food": 15,
+        "Shopping": 10,
+        "Housing": 30,
+        "Health": 8,
+        "Entertainment": 7,
+        "Education": 5,
+        "Finances": 12,
+        "Charity": 3
+    }
+    return {k: round(monthly_income * v / 100, 2) for k, v in percentages.items()}
+
+def build_analysis(
+    statement_id: str,
+    summary: Dict[str, Dict[str, float]],
+    uncategorized_total: float,
+    transactions_count: int,
+    mode: str = "mid",
+) -> Dict:
+    """Per-subcategory emissions plus budget vs actual comparison for /user/analyze."""
+    # Build response summary with emissions per subcategory
+    pairs = [(cat, sub, amt) for cat, subs in summary.items() for sub, amt in subs.items()]
+    factors = factors_for([p[0] for p in pairs], [p[1] for p in pairs], mode=mode)  # kg CO2 per USD
+
+    response_summary = {cat: {} for cat in summary}
+    actual_emissions_by_cat = {}
+    for (cat, sub, amt), factor in zip(pairs, factors.tolist()):
+        emission_val = round(amt * factor, 2) if factor else 0.0
+        response_summary[cat][sub] = {
+            "amount": round(amt, 2),
+            "emission": emission_val
+        }
+        actual_emissions_by_cat[cat] = actual_emissions_by_cat.get(cat, 0.0) + emission_val
+
+    total_actual_emission = round(sum(actual_emissions_by_cat.values()), 2)
+
+    # Compute budgeted emissions per category based on /user/profile dollars
+    allocation_dollars = budget_allocation_dollars()
+    budget_cats = list(allocation_dollars)
+    budget_kg = category_factors_for(budget_cats, mode=mode) * [allocation_dollars[c] for c in budget_cats]
+    budget_emissions_by_cat = {cat: round(kg, 2) for cat, kg in zip(budget_cats, budget_kg.tolist())}
+
+    total_allotted_emission = round(sum(budget_emissions_by_cat.values()), 2)
+
+    # Compare budget vs actual per category
+    comparison = {}
+    all_cats = set(allocation_dollars.keys()) | set(actual_emissions_by_cat.keys())
+    for cat in sorted(all_cats):
+        budget_kg = budget_emissions_by_cat.get(cat, 0.0)
+        actual_kg = actual_emissions_by_cat.get(cat, 0.0)
+        delta_kg = round(actual_kg - budget_kg, 2)
+        delta_pct = round((delta_kg / budget_kg * 100.0), 1) if budget_kg > 0 else None
+        status = "over" if delta_kg > 0 else ("under" if delta_kg < 0 else "on_target")
+        comparison[cat] = {
+            "budgeted_kg": budget_kg,
+            "actual_kg": actual_kg,
+            "delta_kg": delta_kg,
+            "delta_pct": delta_pct,
+            "status": status
+        }
+
+    return {
+        "summary": response_summary,                 # per-subcategory {amount, emission}
+        "uncategorized": round(uncategorized_total, 2),
+        "transactions_count": transactions_count,
+        "statement_id": statement_id,
+        "totals": {
+            "total_allotted_emission": total_allotted_emission,  # budget sum (kg)
+            "total_actual_emission": total_actual_emission,      # actual sum (kg)
+            "delta_kg": round(total_actual_emission - total_allotted_emission, 2)
+        },
+        "budget_comparison_by_category": comparison
+    }
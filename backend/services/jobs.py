@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.database import DB_DIR, SessionLocal
+from models.orm import IngestionJobORM
+from services.executors import job_lane
+from services.pipeline import save_statement, analyze_statement
+
+# Background statement ingestion. A job is keyed by (statement_id, kind), so a
+# second upload of the same file with the same params attaches to the existing
+# job instead of parsing again; different params (mode, persist) re-queue it.
+# A job whose params change while it runs is run again with the new ones. Job state lives in the ingestion_jobs table and the upload is
+# kept under data/jobs/ until the job finishes, so queued or running jobs are
+# picked up again by resume_pending() after a restart.
+JOB_DIR = os.path.join(DB_DIR, "jobs")
+os.makedirs(JOB_DIR, exist_ok=True)
+
+RUNNERS = {
+    "save": save_statement,
+    "analyze": analyze_statement,
+}
+
+_inflight = set()
+_inflight_lock = threading.Lock()
+# Live progress of jobs running in this process (pages parsed, rows inserted).
+# It is served from here by get_job and only written to the job row with the
+# final status: a progress write from inside the pipeline could land while its
+# session holds the SQLite write lock, and would fail with "database is locked".
+_live: Dict[int, Dict] = {}
+PROGRESS_FIELDS = ("pages_parsed", "pages_total", "rows_inserted")
+
+def _payload_path(statement_id: str, kind: str) -> str:
+    return os.path.join(JOB_DIR, f"{statement_id}.{kind}.bin")
+
+def _write_payload(statement_id: str, kind: str, data: bytes) -> None:
+    """Atomic write: a job re-queued while running may be reading the same file."""
+    path = _payload_path(statement_id, kind)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def job_to_dict(job: IngestionJobORM) -> Dict:
+    return {
+        "job_id": job.id,
+        "statement_id": job.statement_id,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": {
+            "pages_parsed": job.pages_parsed or 0,
+            "pages_total": job.pages_total or 0,
+            "rows_inserted": job.rows_inserted or 0,
+        },
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+def get_job(db: Session, statement_id: str, kind: str) -> Optional[Dict]:
+    job = db.query(IngestionJobORM).filter_by(statement_id=statement_id, kind=kind).first()
+    if not job:
+        return None
+    out = job_to_dict(job)
+    with _inflight_lock:
+        live = dict(_live.get(job.id, {}))
+    if job.status == "running":
+        out["progress"].update(live)
+    return out
+
+def _params_json(params: Optional[Dict]) -> str:
+    return json.dumps(params or {}, sort_keys=True)
+
+def enqueue(db: Session, statement_id: str, kind: str, data: bytes, params: Optional[Dict] = None) -> Dict:
+    """
+    Create (or attach to) the job for this statement and hand it to the job workers.
+    Failed jobs, and jobs last requested with different params, are reset and
+    re-queued; any other existing job is returned as-is.
+    """
+    if kind not in RUNNERS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+
+    params_json = _params_json(params)
+    job = db.query(IngestionJobORM).filter_by(statement_id=statement_id, kind=kind).first()
+    if job is not None and job.status != "failed" and _params_json(json.loads(job.params or "{}")) == params_json:
+        return job_to_dict(job)
+    job_id = job.id if job is not None else None
+    # End the read snapshot before writing, so a concurrent commit can't make
+    # the upgrade to a write transaction fail with SQLITE_BUSY. The write below
+    # is a plain UPDATE/INSERT, so it doesn't reload the expired job first.
+    db.commit()
+
+    _write_payload(statement_id, kind, data)
+
+    now = time.time()
+    fields = dict(
+        status="queued", params=params_json, pages_total=0, pages_parsed=0, rows_inserted=0,
+        result=None, error=None, updated_at=now,
+    )
+    if job_id is None:
+        db.add(IngestionJobORM(statement_id=statement_id, kind=kind, created_at=now, **fields))
+    else:
+        db.execute(update(IngestionJobORM).where(IngestionJobORM.id == job_id).values(**fields))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request created the same job first; attach to it.
+        db.rollback()
+        job = db.query(IngestionJobORM).filter_by(statement_id=statement_id, kind=kind).one()
+        return job_to_dict(job)
+
+    job = db.query(IngestionJobORM).filter_by(statement_id=statement_id, kind=kind).one()
+    _submit(job.id)
+    return job_to_dict(job)
+
+def _submit(job_id: int) -> None:
+    with _inflight_lock:
+        if job_id in _inflight:
+            return
+        _inflight.add(job_id)
+    job_lane.submit(_run, job_id)
+
+def _update(job_id: int, params: Optional[str] = None, **fields) -> int:
+    """
+    Write job state in its own short transaction (UPDATE first, no read snapshot).
+    With `params`, only while the job still has those params. Returns the row count.
+    """
+    fields["updated_at"] = time.time()
+    stmt = update(IngestionJobORM).where(IngestionJobORM.id == job_id)
+    if params is not None:
+        stmt = stmt.where(IngestionJobORM.params == params)
+    with SessionLocal() as s:
+        count = s.execute(stmt.values(**fields)).rowcount
+        s.commit()
+    return count
+
+def _run(job_id: int) -> None:
+    try:
+        while _run_once(job_id):
+            print(f"🔁 Ingestion job {job_id} params changed while running; running again")
+    finally:
+        with _inflight_lock:
+            _inflight.discard(job_id)
+            _live.pop(job_id, None)
+
+def _take_live(job_id: int) -> Dict:
+    """Pop the job's live progress, as ingestion_jobs fields."""
+    with _inflight_lock:
+        live = _live.pop(job_id, {})
+    return {k: v for k, v in live.items() if k in PROGRESS_FIELDS}
+
+def _run_once(job_id: int) -> bool:
+    """Run the job with its current params. True if they changed meanwhile (run it again)."""
+    with SessionLocal() as s:
+        job = s.get(IngestionJobORM, job_id)
+        if job is None or job.status == "done":
+            return False
+        statement_id, kind, params_json = job.statement_id, job.kind, job.params or "{}"
+    params = json.loads(params_json)
+
+    path = _payload_path(statement_id, kind)
+    _update(job_id, status="running")
+
+    def progress(**fields):
+        with _inflight_lock:
+            _live.setdefault(job_id, {}).update(fields)
+
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        result = RUNNERS[kind](db, statement_id, data, progress=progress, **params)
+    except Exception as e:
+        db.rollback()
+        if not _update(job_id, params=params_json, status="failed", error=str(e), **_take_live(job_id)):
+            return True
+        print(f"❌ Ingestion job {job_id} failed: {e}")
+        return False
+    finally:
+        db.close()
+
+    if not _update(job_id, params=params_json, status="done", result=json.dumps(result), **_take_live(job_id)):
+        return True
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return False
+
+def resume_pending() -> int:
+    """Re-submit jobs left queued or running by a previous process. Returns the count."""
+    db = SessionLocal()
+    try:
+        ids = [j.id for j in db.query(IngestionJobORM).filter(IngestionJobORM.status.in_(("queued", "running")))]
+    finally:
+        db.close()
+    for job_id in ids:
+        _submit(job_id)
+    return len(ids)
@@ -0,0 +1,85 @@
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from utils.text import date_keys, parse_date, parse_signed_amount
+
+# OFX / QFX downloads, both SGML (OFX 1.x, leaf elements unclosed) and XML
+# (OFX 2.x). Text is tokenized tag by tag as chunks arrive, so a download is
+# parsed in one pass without building a document tree.
+TAG_RE = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+OFX_MARKERS = ("OFXHEADER:", "<OFX>", "<?OFX ")
+
+def looks_like_ofx(head_text: str) -> bool:
+    head = head_text.lstrip()[:1024].upper()
+    return any(m in head for m in OFX_MARKERS)
+
+def _tags(chunks: Iterable[str]) -> Iterator[Tuple[bool, str, str]]:
+    """(closing, NAME, text) for every tag; a tag split across chunks waits for the next one."""
+    buf = ""
+    for chunk in chunks:
+        buf += chunk
+        cut = buf.rfind("<")
+        if cut <= 0:
+            continue
+        for m in TAG_RE.finditer(buf, 0, cut):
+            yield m.group(1) == "/", m.group(2).upper(), m.group(3).strip()
+        buf = buf[cut:]
+    for m in TAG_RE.finditer(buf):
+        yield m.group(1) == "/", m.group(2).upper(), m.group(3).strip()
+
+def _transaction(fields: Dict[str, str]) -> Optional[Dict]:
+    day = date_keys(fields.get("DTPOSTED", ""))
+    description = " ".join((fields.get("NAME") or fields.get("MEMO") or "").split())
+    if day is None or not description:
+        return None
+    try:
+        amount = parse_signed_amount(fields.get("TRNAMT", ""))
+    except ValueError:
+        return None
+    return {
+        "date": day[0],
+        "description": description,
+        "amount": round(amount, 2),
+        "balance": None,
+        "posted_on": day[1],
+    }
+
+def iter_ofx_transactions(chunks: Iterable[str]) -> Iterator[Dict]:
+    """
+    Transaction dicts ({date: MM/DD, description, amount, balance, posted_on})
+    for every <STMTTRN> in the document, from any iterable of text chunks.
+    """
+    fields: Optional[Dict[str, str]] = None
+    skipped = 0
+    for closing, name, value in _tags(chunks):
+        # SGML leaves STMTTRN unclosed: it ends at the next one or at </BANKTRANLIST>
+        ends = name == "STMTTRN" or (closing and name == "BANKTRANLIST")
+        if ends and fields is not None:
+            row = _transaction(fields)
+            if row:
+                yield row
+            else:
+                skipped += 1
+            fields = None
+        if name == "STMTTRN" and not closing:
+            fields = {}
+        elif fields is not None and not closing and value:
+            fields[name] = value
+    if fields:
+        row = _transaction(fields)
+        if row:
+            yield row
+    if skipped:
+        print(f"⚠️ OFX: skipped {skipped} unparseable transactions")
+
+PERIOD_TAG_RE = re.compile(r"<(DTSTART|DTEND)>\s*(\d{8})", re.I)
+
+def ofx_period(text: str) -> Optional[Tuple[str, str]]:
+    """(start, end) ISO dates from the first BANKTRANLIST's DTSTART/DTEND."""
+    found = {}
+    for m in PERIOD_TAG_RE.finditer(text):
+        found.setdefault(m.group(1).upper(), parse_date(m.group(2)))
+        if len(found) == 2:
+            break
+    start, end = found.get("DTSTART"), found.get("DTEND")
+    return (start.isoformat(), end.isoformat()) if start and end and start <= end else None
@@ -0,0 +1,277 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from db.database import DB_DIR
+from services.pdf_parser import iter_extract_transactions, statement_period
+from utils.lru import LRUCache
+
+# Parsed statements keyed by sha256(pdf_bytes) (the statement_id), parser kind
+# and PARSER_VERSION. Every entry is written as JSON lines (one row per line)
+# under PARSE_CACHE_DIR (data/parse_cache/) so repeat uploads skip pdfplumber
+# even after a restart; rows are streamed to the file while the statement is
+# parsed and read back lazily, so neither side holds a whole statement.
+# Entries of up to PARSE_CACHE_MEMORY_ROWS rows are also kept in an in-memory
+# LRU. The disk store keeps at most PARSE_CACHE_DISK_ENTRIES files, evicting
+# the least recently used (by mtime, refreshed on disk hits). The directory is
+# only scanned when the cache is created (on first use) and when the file
+# count tracked since then crosses the bound; a prune then trims to PRUNE_TO
+# of the bound so the next one is another ~10% of puts away.
+#
+# Bump PARSER_VERSION whenever pdf_parser output changes for the same PDF: files
+# from other versions are never read and are deleted at startup.
+PARSER_VERSION = 2  # 2: parse_line slices descriptions at the amount match, not rfind
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(DB_DIR, "parse_cache"))
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "64"))
+PARSE_CACHE_MEMORY_ROWS = int(os.getenv("PARSE_CACHE_MEMORY_ROWS", "5000"))
+PARSE_CACHE_DISK_ENTRIES = int(os.getenv("PARSE_CACHE_DISK_ENTRIES", "2000"))
+PRUNE_TO = 0.9
+CACHE_FILE_EXTENSIONS = (".json", ".jsonl")  # .json: pre-streaming entries
+
+class ParseCache:
+    def __init__(
+        self,
+        directory: str = PARSE_CACHE_DIR,
+        maxsize: int = PARSE_CACHE_SIZE,
+        disk_entries: int = PARSE_CACHE_DISK_ENTRIES,
+        version: int = PARSER_VERSION,
+        memory_rows: int = PARSE_CACHE_MEMORY_ROWS,
+    ):
+        self.directory = directory
+        self.memory = LRUCache(maxsize)
+        self.memory_rows = memory_rows
+        self.disk_entries = max(1, disk_entries)
+        self.version = version
+        self._suffix = f".v{version}.jsonl"
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._disk_count = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._prune(self.disk_entries)
+
+    def _path(self, statement_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{statement_id}.{kind}{self._suffix}")
+
+    def _prune(self, keep: int) -> None:
+        """Delete entries from other parser versions, then all but the `keep` newest."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(CACHE_FILE_EXTENSIONS):
+                continue
+            try:
+                if entry.name.endswith(self._suffix):
+                    entries.append((entry.stat().st_mtime, entry.path))
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        entries.sort()
+        evict = entries[:max(0, len(entries) - keep)]
+        for _, path in evict:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            with self._lock:
+                self.disk_evictions += 1
+        with self._lock:
+            self._disk_count = len(entries) - len(evict)
+
+    def get(self, statement_id: str, kind: str) -> Optional[Iterable[Dict]]:
+        """The cached rows (read lazily from disk on a memory miss), or None."""
+        key = (statement_id, kind, self.version)
+        rows = self.memory.get(key)
+        if rows is not None:
+            with self._lock:
+                self.hits += 1
+            return rows
+
+        path = self._path(statement_id, kind)
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+        return self._read(f, key)
+
+    def _read(self, f, key) -> Iterator[Dict]:
+        kept: Optional[List[Dict]] = []
+        with f:
+            for line in f:
+                row = json.loads(line)
+                if kept is not None:
+                    kept.append(row)
+                    if len(kept) > self.memory_rows:
+                        kept = None
+                yield row
+        if kept is not None:
+            self.memory.put(key, kept)
+
+    def writer(self, statement_id: str, kind: str) -> "CacheWriter":
+        return CacheWriter(self, statement_id, kind)
+
+    def put(self, statement_id: str, kind: str, rows: Iterable[Dict]) -> None:
+        with self.writer(statement_id, kind) as w:
+            for row in rows:
+                w.add(row)
+
+    def _added(self) -> None:
+        with self._lock:
+            self._disk_count += 1
+            full = self._disk_count > self.disk_entries
+        if full:
+            self._prune(int(self.disk_entries * PRUNE_TO))
+
+    def clear(self) -> None:
+        self.memory.clear()
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_FILE_EXTENSIONS):
+                os.remove(os.path.join(self.directory, name))
+        with self._lock:
+            self._disk_count = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_evictions": self.disk_evictions,
+            "version": self.version,
+            "memory": self.memory.stats(),
+        }
+
+class CacheWriter:
+    """
+    Streams one entry's rows to a temp file; `commit()` (or leaving the
+    `with` block cleanly) moves it into place, `discard()` drops it. The rows
+    are also kept for the memory LRU until there are more than memory_rows.
+    """
+
+    def __init__(self, cache: ParseCache, statement_id: str, kind: str):
+        self.cache = cache
+        self.key = (statement_id, kind, cache.version)
+        self.path = cache._path(statement_id, kind)
+        self.tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.kept: Optional[List[Dict]] = []
+        try:
+            self.f = open(self.tmp, "w", encoding="utf-8")
+        except OSError as e:
+            print(f"Parse cache write error: {e}")
+            self.f = None
+
+    def add(self, row: Dict) -> None:
+        if self.kept is not None:
+            self.kept.append(row)
+            if len(self.kept) > self.cache.memory_rows:
+                self.kept = None
+        if self.f is None:
+            return
+        try:
+            self.f.write(json.dumps(row) + "\n")
+        except OSError as e:
+            print(f"Parse cache write error: {e}")
+            self.discard()
+
+    def commit(self) -> None:
+        if self.kept is not None:
+            self.cache.memory.put(self.key, self.kept)
+        if self.f is None:
+            return
+        existed = os.path.exists(self.path)
+        try:
+            self.f.close()
+            os.replace(self.tmp, self.path)
+        except OSError as e:
+            print(f"Parse cache write error: {e}")
+            self.discard()
+            return
+        self.f = None
+        if not existed:
+            self.cache._added()
+
+    def discard(self) -> None:
+        self.kept = None
+        if self.f is None:
+            return
+        self.f.close()
+        self.f = None
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "CacheWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+_cache: Optional[ParseCache] = None
+_cache_lock = threading.Lock()
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide cache, created (and its directory pruned) on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache()
+    return _cache
+
+def cached_statement_period(statement_id: str, pdf_bytes: bytes) -> Optional[Dict[str, str]]:
+    """{"start", "end"} ISO dates of the statement period (page 1 only), or None."""
+    parse_cache = get_parse_cache()
+    rows = parse_cache.get(statement_id, "statement_period")
+    if rows is None:
+        period = statement_period(pdf_bytes)
+        rows = [{"start": period[0], "end": period[1]}] if period else []
+        parse_cache.put(statement_id, "statement_period", rows)
+    rows = list(rows)
+    return dict(rows[0]) if rows else None
+
+def lookup_statement_period(statement_id: str) -> Optional[Dict[str, str]]:
+    """The cached statement period, without the PDF; None if it isn't cached (or has none)."""
+    rows = get_parse_cache().get(statement_id, "statement_period")
+    rows = list(rows or ())
+    return dict(rows[0]) if rows else None
+
+def cached_iter_extract_transactions(
+    statement_id: str,
+    pdf_bytes: bytes,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[Dict]:
+    """
+    `extract_transactions` behind the parse cache, lazily. On a miss rows are
+    yielded page by page as they're parsed and streamed to the cache file,
+    which only replaces the entry once the statement has been fully consumed.
+    `progress` only fires on a miss.
+    """
+    parse_cache = get_parse_cache()
+    rows = parse_cache.get(statement_id, "extract_transactions")
+    if rows is not None:
+        for r in rows:
+            yield dict(r)
+        return
+
+    with parse_cache.writer(statement_id, "extract_transactions") as w:
+        for r in iter_extract_transactions(pdf_bytes, progress=progress):
+            w.add(r)
+            yield dict(r)
@@ -0,0 +1,180 @@
+import io
+import re
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from services.csv_parser import iter_csv_transactions, sniff_dialect
+from services.ofx_parser import iter_ofx_transactions, looks_like_ofx, ofx_period
+from services.parse_cache import cached_iter_extract_transactions, cached_statement_period
+from services.pdf_parser import first_page_text
+from utils.text import decode_text, detect_encoding
+
+# Statement format registry. Each parser declares a cheap fingerprint over the
+# first SNIFF_BYTES of the upload (plus, for PDFs, the text of page 1 only), so
+# detection never costs a full failed parse. detect() returns the first
+# registered parser whose sniff() matches; its `name` is stored as
+# transactions.source. GenericPdfParser is registered last and takes any PDF
+# the specific parsers didn't claim. Every parser yields the same transaction dicts:
+#   {date: MM/DD, description, amount (negative = spend), balance, [posted_on]}
+# StreamingParsers (`streaming = True`) can also parse straight from a file
+# object in chunks (see stream(); used by /statements/import).
+SNIFF_BYTES = 4096
+STREAM_CHUNK_CHARS = 1 << 20
+Progress = Callable[[int, int], None]
+
+class UnsupportedStatement(ValueError):
+    pass
+
+class Sample:
+    """The bytes a fingerprint may look at, each computed at most once."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.head = data[:SNIFF_BYTES]
+        self.is_pdf = self.head.lstrip()[:5] == b"%PDF-"
+        self._text: Optional[str] = None
+        self._first_page: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Decoded head (non-PDF uploads)."""
+        if self._text is None:
+            self._text = "" if self.is_pdf else decode_text(self.head)
+        return self._text
+
+    @property
+    def first_page(self) -> str:
+        if self._first_page is None:
+            try:
+                self._first_page = first_page_text(self.data) if self.is_pdf else ""
+            except Exception:  # corrupt PDF: no PDF parser will match
+                self._first_page = ""
+        return self._first_page
+
+class StatementParser(ABC):
+    name = "base"
+    extensions: Tuple[str, ...] = ()
+    streaming = False
+
+    @abstractmethod
+    def sniff(self, sample: Sample) -> bool:
+        ...
+
+    @abstractmethod
+    def extract(self, statement_id: str, data: bytes, progress: Optional[Progress] = None) -> Iterator[Dict]:
+        """Transaction dicts for a whole upload, yielded lazily."""
+
+    def period(self, statement_id: str, data: bytes) -> Optional[Dict[str, str]]:
+        """{"start", "end"} ISO statement period, for rows without posted_on."""
+        return None
+
+class StreamingParser(StatementParser):
+    """A parser that reads a binary file object incrementally, never the whole upload."""
+    streaming = True
+
+    @abstractmethod
+    def stream(self, f: BinaryIO) -> Iterator[Dict]:
+        """Transaction dicts read incrementally from a binary file object."""
+
+    def extract(self, statement_id: str, data: bytes, progress: Optional[Progress] = None) -> Iterator[Dict]:
+        return self.stream(io.BytesIO(data))
+
+class ChasePdfParser(StatementParser):
+    """Chase checking statement PDFs (pdf_parser.py, behind the parse cache)."""
+    name = "chase_pdf"
+    extensions = (".pdf",)
+    MARKER_RE = re.compile(r"JPMorgan Chase|chase\.com|TRANSACTION DETAIL", re.I)
+
+    def sniff(self, sample: Sample) -> bool:
+        return sample.is_pdf and bool(self.MARKER_RE.search(sample.first_page))
+
+    def extract(self, statement_id: str, data: bytes, progress: Optional[Progress] = None) -> Iterator[Dict]:
+        return cached_iter_extract_transactions(statement_id, data, progress=progress)
+
+    def period(self, statement_id: str, data: bytes) -> Optional[Dict[str, str]]:
+        return cached_statement_period(statement_id, data)
+
+class GenericPdfParser(ChasePdfParser):
+    """
+    Any other PDF, through the same line parser (pdf_parser.parse_line: lines
+    ending in amount + balance) that every PDF went through before detection.
+    """
+    name = "pdf"
+
+    def sniff(self, sample: Sample) -> bool:
+        return sample.is_pdf
+
+def text_stream(f: BinaryIO) -> io.TextIOWrapper:
+    """Buffered, incrementally decoded text over `f` (encoding sniffed from the first bytes)."""
+    pos = f.tell()
+    encoding = detect_encoding(f.read(SNIFF_BYTES))
+    f.seek(pos)
+    return io.TextIOWrapper(f, encoding=encoding, errors="replace", newline="")
+
+class CsvParser(StreamingParser):
+    """Bank CSV exports, streamed line by line (no pdfplumber)."""
+    name = "csv"
+    extensions = (".csv", ".txt")
+
+    def sniff(self, sample: Sample) -> bool:
+        if sample.is_pdf:
+            return False
+        first = next((line for line in sample.text.splitlines() if line.strip()), "")
+        return sniff_dialect(first) is not None
+
+    def stream(self, f: BinaryIO) -> Iterator[Dict]:
+        return iter_csv_transactions(text_stream(f))
+
+class OfxParser(StreamingParser):
+    """OFX/QFX downloads (SGML or XML), tokenized in one pass (no pdfplumber)."""
+    name = "ofx"
+    extensions = (".ofx", ".qfx")
+
+    def sniff(self, sample: Sample) -> bool:
+        return not sample.is_pdf and looks_like_ofx(sample.text)
+
+    def stream(self, f: BinaryIO) -> Iterator[Dict]:
+        text = text_stream(f)
+        return iter_ofx_transactions(iter(lambda: text.read(STREAM_CHUNK_CHARS), ""))
+
+    def period(self, statement_id: str, data: bytes) -> Optional[Dict[str, str]]:
+        period = ofx_period(decode_text(data[:64 * 1024]))
+        return {"start": period[0], "end": period[1]} if period else None
+
+PARSERS: List[StatementParser] = []
+
+def register(parser: StatementParser) -> StatementParser:
+    PARSERS.append(parser)
+    return parser
+
+for _parser in (ChasePdfParser(), OfxParser(), CsvParser(), GenericPdfParser()):
+    register(_parser)
+
+def get_parser(name: str) -> StatementParser:
+    for parser in PARSERS:
+        if parser.name == name:
+            return parser
+    raise KeyError(name)
+
+def supported_extensions(streaming: bool = False) -> Tuple[str, ...]:
+    """Upload extensions of every parser (streaming=True: parsers that can stream only)."""
+    return tuple(dict.fromkeys(ext for p in PARSERS if p.streaming or not streaming for ext in p.extensions))
+
+def accepts_filename(filename: Optional[str], streaming: bool = False) -> bool:
+    return (filename or "").lower().endswith(supported_extensions(streaming))
+
+def detect(data: bytes, streaming: bool = False) -> StatementParser:
+    """
+    First registered parser whose fingerprint matches; UnsupportedStatement if
+    none do. streaming=True only considers parsers that can stream, and `data`
+    may then be just the first SNIFF_BYTES of the file.
+    """
+    sample = Sample(data)
+    candidates = [p for p in PARSERS if p.streaming or not streaming]
+    for parser in candidates:
+        if parser.sniff(sample):
+            return parser
+    kind = "PDF" if sample.is_pdf else "file"
+    raise UnsupportedStatement(
+        f"Unrecognized statement {kind}; supported formats: {', '.join(p.name for p in candidates)}"
+    )
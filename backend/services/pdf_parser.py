@@ -1,71 +1,172 @@
-import re, pdfplumber
-from typing import List, Optional, Dict
+import os, re, threading, time, pdfplumber
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Dict, Tuple
 from io import BytesIO
 
-from models.schemas import Transaction
-from utils.text import to_amount
+from services.executors import cpu_lane
+from utils.text import parse_statement_period
 
 DATE_RE = re.compile(r"^\d{2}/\d{2}\b")
 
-def _parse_transaction_line(line: str) -> Optional[Transaction]:
-    """
-    Parse a single Chase statement transaction line like:
-      06/16 Card Purchase           06/14 Sq *Vigneshwara LLC Tempe AZ Card 4781 -11.94 7,122.53
-
-    Heuristic:
-    - First token looks like MM/DD -> date
-    - Last token is balance
-    - Second-last token is amount (may be negative)
-    - Everything between date and amount is description
-    """
-    raw = " ".join(line.split())
-    if not DATE_RE.match(raw):
-        return None
+# Page-parallel extraction. Documents are split into page ranges of at most
+# PDF_RANGE_PAGES pages (and at least PDF_PARSE_WORKERS ranges, default one per
+# core) that run on the shared cpu process pool, so parsing never holds the
+# caller's GIL. Only PDF_PARSE_WORKERS + 1 ranges are in flight at a time, so
+# a long statement's rows are never all held at once. Short documents go out
+# as one range. PDF_PARSE_WORKERS=0 selects the serial in-process path.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+PDF_RANGE_PAGES = int(os.getenv("PDF_RANGE_PAGES", "16"))
+
+# Page triage. Before pdfminer interprets a page (building char objects is
+# ~90% of its parse cost), pdfium's text layer is checked for a
+# transaction-section marker in the header band (top PDF_TRIAGE_HEADER_PT
+# points) or, failing that, for MM/DD and money-shaped text anywhere on the
+# page. Pages with neither (blank "intentionally left blank" pages,
+# disclosures, error-resolution notices) can't yield a transaction line and
+# are skipped. Without pypdfium2 the same check runs on pdfplumber's chars,
+# which still skips text extraction. PDF_PAGE_TRIAGE=0 disables it.
+PDF_PAGE_TRIAGE = os.getenv("PDF_PAGE_TRIAGE", "1") != "0"
+PDF_TRIAGE_HEADER_PT = float(os.getenv("PDF_TRIAGE_HEADER_PT", "120"))
+TRANSACTION_MARKERS = ("TRANSACTIONDETAIL",)  # whitespace stripped, upper case
+DATE_HINT_RE = re.compile(r"\d{2}/\d{2}")
+MONEY_HINT_RE = re.compile(r"\d\.\d{2}")
+TRIAGE_COUNTERS = ("pages", "parsed", "skipped_empty", "skipped_no_markers", "triage_ms", "extract_ms")
+
+# ---- Page triage ----
+
+try:
+    import pypdfium2  # installed with pdfplumber
+except ImportError:  # pragma: no cover
+    pypdfium2 = None
+
+_pdfium_lock = threading.Lock()  # pdfium is not thread-safe
 
-    parts = raw.split(" ")
-    if len(parts) < 4:
+def _triage_text(header: str, body: Callable[[], str]) -> Optional[str]:
+    """None if the page may hold transactions, else why it can be skipped ("empty" / "no_markers")."""
+    if any(m in "".join(header.split()).upper() for m in TRANSACTION_MARKERS):
         return None
+    text = body()
+    if not text.strip():
+        return "empty"
+    if DATE_HINT_RE.search(text) and MONEY_HINT_RE.search(text):
+        return None
+    return "no_markers"
 
-    date = parts[0]
-    balance_token = parts[-1]
-    amount_token = parts[-2]
-    description_tokens = parts[1:-2]
-    description = " ".join(description_tokens)
+def triage_page(page) -> Optional[str]:
+    """`_triage_text` on a pdfplumber page's char objects (interprets the page)."""
+    chars = page.chars
+    header = "".join(c["text"] for c in chars if c["top"] < PDF_TRIAGE_HEADER_PT)
+    return _triage_text(header, lambda: "".join(c["text"] for c in chars))
 
-    try:
-        amount = to_amount(amount_token)
-        balance = to_amount(balance_token)
-    except ValueError:
+def triage_pages(pdf_bytes: bytes, start: int, stop: int) -> Optional[List[Optional[str]]]:
+    """`_triage_text` for pages [start, stop) from pdfium's text layer; None without pypdfium2."""
+    if pypdfium2 is None:
         return None
+    decisions = []
+    with _pdfium_lock:
+        doc = pypdfium2.PdfDocument(pdf_bytes)
+        try:
+            for i in range(start, stop):
+                page = doc[i]
+                textpage = page.get_textpage()
+                try:
+                    top = page.get_height()
+                    header = textpage.get_text_bounded(top=top, bottom=top - PDF_TRIAGE_HEADER_PT)
+                    decisions.append(_triage_text(header, textpage.get_text_bounded))
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            doc.close()
+    return decisions
+
+def new_triage_counts() -> Dict[str, float]:
+    return dict.fromkeys(TRIAGE_COUNTERS, 0)
 
-    return Transaction(date=date, description=description, amount=amount, balance=balance)
+def merge_triage_counts(into: Dict[str, float], other: Dict[str, float]) -> Dict[str, float]:
+    for k in TRIAGE_COUNTERS:
+        into[k] += other.get(k, 0)
+    return into
 
-def parse_pdf(pdf_bytes: bytes) -> List[Transaction]:
+def _triaged(page, page_fn: Callable, counts: Dict[str, float], reason: Optional[str] = None) -> List:
     """
-    Extract transactions from a Chase PDF statement.
-    Strategy:
-      - Iterate relevant pages (Chase typically has 'TRANSACTION DETAIL' on page 2+)
-      - Extract text lines; parse ones that look like transactions
+    page_fn(page), or [] when triage says the page has no transactions.
+    `reason` is a precomputed pdfium decision; "" means triage it here from chars.
     """
-    txns: List[Transaction] = []
+    counts["pages"] += 1
+    if reason == "":
+        t0 = time.perf_counter()
+        reason = triage_page(page)
+        counts["triage_ms"] += (time.perf_counter() - t0) * 1000
+    if reason:
+        counts[f"skipped_{reason}"] += 1
+        return []
+    t0 = time.perf_counter()
+    rows = page_fn(page)
+    counts["extract_ms"] += (time.perf_counter() - t0) * 1000
+    counts["parsed"] += 1
+    return rows
+
+# Process-wide totals of every triage run in this process (see triage_stats()).
+_triage_totals = new_triage_counts()
+_triage_lock = threading.Lock()
+
+def _log_triage(counts: Dict[str, float]) -> None:
+    with _triage_lock:
+        merge_triage_counts(_triage_totals, counts)
+    skipped = counts["pages"] - counts["parsed"]
+    print(
+        f"📄 Page triage: {counts['pages']} pages, {counts['parsed']} parsed, {skipped} skipped "
+        f"(empty {counts['skipped_empty']}, no markers {counts['skipped_no_markers']}); "
+        f"triage {counts['triage_ms']:.1f}ms, extract {counts['extract_ms']:.1f}ms"
+    )
+
+def triage_stats() -> Dict[str, float]:
+    with _triage_lock:
+        out = dict(_triage_totals)
+    out["triage_ms"] = round(out["triage_ms"], 1)
+    out["extract_ms"] = round(out["extract_ms"], 1)
+    out["enabled"] = PDF_PAGE_TRIAGE
+    return out
+
+def _iter_pages(
+    pdf_bytes: bytes,
+    start: int,
+    stop: int,
+    page_fn: Callable,
+    counts: Optional[Dict[str, float]] = None,
+) -> Iterator[List]:
+    """
+    Yield page_fn(page) for pages [start, stop), one page at a time, skipping
+    pages that fail triage (tallied into `counts`).
+    Each page's layout objects are released as soon as it has been parsed,
+    so memory is bounded by a single page rather than the whole document.
+    """
+    counts = new_triage_counts() if counts is None else counts
+    decisions = [None] * (stop - start)
+    if PDF_PAGE_TRIAGE:
+        t0 = time.perf_counter()
+        decisions = triage_pages(pdf_bytes, start, stop) or [""] * (stop - start)
+        counts["triage_ms"] += (time.perf_counter() - t0) * 1000
     with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            if not text:
-                continue
-            for line in text.splitlines():
-                line = line.strip()
-                if not line or not DATE_RE.match(line):
-                    continue
-                t = _parse_transaction_line(line)
-                if t:
-                    txns.append(t)
-    return txns
+        for i in range(start, stop):
+            page = pdf.pages[i]
+            try:
+                yield _triaged(page, page_fn, counts, decisions[i - start])
+            finally:
+                page.close()
+
+def _range_rows(pdf_bytes: bytes, start: int, stop: int, page_fn: Callable) -> Tuple[List, Dict[str, float]]:
+    counts = new_triage_counts()
+    rows = [r for page_rows in _iter_pages(pdf_bytes, start, stop, page_fn, counts) for r in page_rows]
+    return rows, counts
 
 MONEY = r"-?\d{1,3}(?:,\d{3})*(?:\.\d{2})"
-LINE_RE = re.compile(
-    rf"^(?P<date>\d{{2}}/\d{{2}})\s+(?P<desc>.*?)\s+(?P<amount>{MONEY})\s+(?P<balance>{MONEY})$"
-)
+MONEY_RE = re.compile(MONEY)
+# Fallback tokenizer: a zero-width date anchor at the start of the line, then
+# every money token, in one finditer pass (same tokens as re.findall(MONEY)).
+DATE_MONEY_RE = re.compile(rf"^(?=(?P<date>\d{{2}}/\d{{2}})\b)|(?P<money>{MONEY})")
 
 IGNORE_SUBSTRINGS = (
     "Deposits and Additions",
@@ -82,69 +183,206 @@ IGNORE_SUBSTRINGS = (
     "Account Number",
     "Chase College Checking",
 )
+# Lowercased once at import; a line is lowercased once and scanned with str.__contains__
+# (C substring search), which beats a compiled alternation of the same needles in sre.
+IGNORE_LOWER = tuple(s.lower() for s in IGNORE_SUBSTRINGS)
 
-def _looks_like_noise(line: str) -> bool:
-    if not line:
-        return True
-    if line[0].isalpha():
-        return True
-    for s in IGNORE_SUBSTRINGS:
-        if s.lower() in line.lower():
+def _is_noise(line: str) -> bool:
+    low = line.lower()
+    for s in IGNORE_LOWER:
+        if s in low:
             return True
     return False
 
 def _clean_spaces(s: str) -> str:
     return " ".join(s.split())
 
-def extract_transactions(pdf_bytes: bytes) -> List[Dict[str, str]]:
+def _to_float(x: str) -> float:
+    return float(x.replace(",", ""))
+
+def parse_line(raw: str) -> Optional[Dict[str, str]]:
+    """
+    One extracted text line -> {date, description, amount, balance}, or None.
+    Every transaction line starts with MM/DD, so anything else is rejected on
+    the raw text before any cleanup or regex work.
+    """
+    line = raw.strip()
+    if not DATE_RE.match(line):
+        return None
+    line = _clean_spaces(line)
+    if _is_noise(line):
+        return None
+
+    # Fast path, "MM/DD <desc> <amount> <balance>" on a space-normalized line:
+    # the last two tokens are money and everything after the date is desc.
+    head, _, tail = line.rpartition(" ")
+    head, _, mid = head.rpartition(" ")
+    if len(head) > 6 and head[5] == " " and MONEY_RE.fullmatch(mid) and MONEY_RE.fullmatch(tail):
+        date, desc = head[:5], head[6:]
+        amount_str, balance_str = mid, tail
+    else:
+        money = [t for t in DATE_MONEY_RE.finditer(line) if t.lastgroup == "money"]
+        if len(money) < 2:
+            return None
+        date = line.split()[0]
+        amount, balance = money[-2], money[-1]
+        desc = line[len(date):amount.start()].strip()
+        amount_str, balance_str = amount.group(), balance.group()
+
+    try:
+        return {
+            "date": date,
+            "description": desc,
+            "amount": _to_float(amount_str),
+            "balance": _to_float(balance_str),
+        }
+    except ValueError:
+        return None
+
+def _page_extract(page) -> List[Dict[str, str]]:
+    """Transaction dicts on one page (see `extract_transactions`)."""
+    text = page.extract_text(x_tolerance=2, y_tolerance=3) or ""
+    return [r for r in map(parse_line, text.splitlines()) if r is not None]
+
+def _extract_pages(pdf_bytes: bytes, start: int, stop: int) -> Tuple[List[Dict[str, str]], Dict[str, float]]:
+    """Extract transaction dicts from pages [start, stop), plus triage counts."""
+    return _range_rows(pdf_bytes, start, stop, _page_extract)
+
+def iter_extract_transactions(
+    pdf_bytes: bytes,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[Dict[str, str]]:
+    """Lazily yield `extract_transactions` dicts in page order."""
+    return _iter_paged(_extract_pages, _page_extract, pdf_bytes, workers, progress)
+
+def extract_transactions(
+    pdf_bytes: bytes,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[Dict[str, str]]:
     """
     Extract Chase transactions as a list of dicts:
       {date: MM/DD, description: str, amount: float, balance: float}
     We rely on the transcript-like lines that end with two money tokens:
     ... <amount> <balance>
+    Pages are split across `workers` processes (default PDF_PARSE_WORKERS)
+    and merged back in page order. `progress(pages_done, pages_total)` is
+    called as page ranges finish.
     """
-    res: List[Dict[str, str]] = []
+    return list(iter_extract_transactions(pdf_bytes, workers, progress))
+
+def statement_period(pdf_bytes: bytes) -> Optional[Tuple[str, str]]:
+    """(start, end) ISO dates of the statement period printed on page 1, if any."""
     with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text(x_tolerance=2, y_tolerance=3) or ""
-            for raw in text.splitlines():
-                line = _clean_spaces(raw.strip())
-                if not line or _looks_like_noise(line):
-                    continue
-
-                m = LINE_RE.match(line)
-                if not m:
-                    money_tokens = re.findall(MONEY, line)
-                    if len(money_tokens) >= 2 and re.match(r"^\d{2}/\d{2}\b", line):
-                        date = line.split()[0]
-                        amount_str, balance_str = money_tokens[-2], money_tokens[-1]
-                        try:
-                            idx_amt = line.rfind(amount_str)
-                            desc = line[len(date):idx_amt].strip()
-                        except Exception:
-                            continue
-                    else:
-                        continue
-                else:
-                    date = m.group("date")
-                    desc = m.group("desc").strip()
-                    amount_str = m.group("amount")
-                    balance_str = m.group("balance")
-
-                def to_float(x: str) -> float:
-                    return float(x.replace(",", ""))
+        if not pdf.pages:
+            return None
+        page = pdf.pages[0]
+        try:
+            period = parse_statement_period(page.extract_text() or "")
+        finally:
+            page.close()
+    return (period[0].isoformat(), period[1].isoformat()) if period else None
 
+def first_page_text(pdf_bytes: bytes) -> str:
+    """Text of page 1 only (format sniffing), via pdfium when available."""
+    if pypdfium2 is not None:
+        with _pdfium_lock:
+            doc = pypdfium2.PdfDocument(pdf_bytes)
+            try:
+                if len(doc) == 0:
+                    return ""
+                page = doc[0]
+                textpage = page.get_textpage()
                 try:
-                    amount = to_float(amount_str)
-                    balance = to_float(balance_str)
-                except ValueError:
-                    continue
-
-                res.append({
-                    "date": date,
-                    "description": desc,
-                    "amount": amount,
-                    "balance": balance,
-                })
-
-    return res
\ No newline at end of file
+                    return textpage.get_text_bounded()
+                finally:
+                    textpage.close()
+                    page.close()
+            finally:
+                doc.close()
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        if not pdf.pages:
+            return ""
+        page = pdf.pages[0]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()
+
+# ---- Page-parallel engine ----
+
+def page_count(pdf_bytes: bytes) -> int:
+    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
+        return len(pdf.pages)
+
+def page_ranges(n_pages: int, n_chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, n_pages) into at most n_chunks contiguous, near-equal ranges.
+    e.g. page_ranges(10, 3) -> [(0, 4), (4, 7), (7, 10)]
+    """
+    n_chunks = max(1, min(n_chunks, n_pages))
+    size, extra = divmod(n_pages, n_chunks)
+    ranges, start = [], 0
+    for i in range(n_chunks):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _iter_paged(
+    range_fn: Callable[[bytes, int, int], Tuple[List, Dict[str, float]]],
+    page_fn: Callable,
+    pdf_bytes: bytes,
+    workers: Optional[int],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator:
+    """
+    Yield rows for the whole document in page order.
+    Page ranges run as `range_fn(pdf_bytes, start, stop)` on the cpu process
+    pool and are yielded as each range completes, with at most workers + 1
+    ranges submitted ahead of the consumer. workers <= 0 parses in process
+    with `page_fn`, one page at a time. Documents shorter than
+    PDF_PARALLEL_MIN_PAGES go out as a single range. Page triage counts are
+    merged across ranges and logged once the whole document has been read.
+    """
+    workers = PDF_PARSE_WORKERS if workers is None else workers
+    n_pages = page_count(pdf_bytes)
+    counts = new_triage_counts()
+    if workers <= 0:
+        for i, rows in enumerate(_iter_pages(pdf_bytes, 0, n_pages, page_fn, counts)):
+            yield from rows
+            if progress:
+                progress(i + 1, n_pages)
+        _log_triage(counts)
+        return
+
+    if n_pages >= PDF_PARALLEL_MIN_PAGES:
+        n_chunks = max(workers, -(-n_pages // max(1, PDF_RANGE_PAGES)))
+    else:
+        n_chunks = 1
+    ranges = iter(page_ranges(n_pages, n_chunks))
+    pending: deque = deque()
+
+    def submit_next() -> None:
+        for start, stop in ranges:
+            pending.append((stop, cpu_lane.submit(range_fn, pdf_bytes, start, stop)))
+            return
+
+    try:
+        for _ in range(workers + 1):
+            submit_next()
+        while pending:
+            stop, fut = pending.popleft()
+            rows, range_counts = fut.result()
+            submit_next()
+            merge_triage_counts(counts, range_counts)
+            yield from rows
+            del rows
+            if progress:
+                progress(stop, n_pages)
+    finally:
+        for _, fut in pending:
+            fut.cancel()
+    _log_triage(counts)
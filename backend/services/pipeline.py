@@ -0,0 +1,260 @@
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from services.executors import run_parse, run_db
+from services.ingestion import (
+    SpendSummary, build_analysis, period_dates, save_response, summary_rows, transaction_rows,
+)
+from services.parse_cache import lookup_statement_period
+from services.parsers import StatementParser, detect
+from services.repository import (
+    BULK_INSERT_BATCH_SIZE, fill_posted_on, statements_missing_posted_on, stream_insert_transactions,
+    upsert_category_summaries,
+)
+from utils.spool import BatchSpool
+
+# One staged ingestion pipeline for every statement endpoint and background job:
+#
+#   extract     detect the format (services/parsers.py), then upload -> transaction
+#               dicts + statement period (Chase PDFs go through the parse cache)
+#   parse       -> `transactions` rows with posted_on dates and source = parser name
+#   categorize  -> category/subcategory per row + spend summary (one pass)
+#   persist     -> stream_insert_transactions (deduped on uq_txn_key)
+#   summaries   -> upsert_category_summaries
+#   emissions   -> build_analysis (emissions, budget vs actual)
+#
+# A single parse feeds both transaction rows and category summaries. extract
+# and parse are lazy generators; categorize drains them BULK_INSERT_BATCH_SIZE
+# rows at a time (so its timing includes the upstream work) and spools the
+# categorized batches, in memory up to PIPELINE_SPOOL_BYTES and in a temp file
+# beyond that. persist then inserts from the spool, so the SQLite write
+# transaction only covers the inserts, never the PDF parse. Each stage is
+# timed; persist/summaries/emissions can be skipped. extract/parse/categorize
+# run on the parse lane and DB stages on the db lane when awaited via arun().
+Progress = Callable[..., None]
+
+PIPELINE_SPOOL_BYTES = int(os.getenv("PIPELINE_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+STAGES = ("extract", "parse", "categorize", "persist", "summaries", "emissions")
+SKIPPABLE = frozenset({"persist", "summaries", "emissions"})
+_DB_STAGES = frozenset({"persist", "summaries"})
+
+def _noop(**_fields) -> None:
+    pass
+
+@contextmanager
+def _as_value_error() -> Iterator[None]:
+    """Surface parser failures as ValueError (the routers' 400 / failed job)."""
+    try:
+        yield
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(str(e) or type(e).__name__) from e
+
+class IngestionRun:
+    def __init__(
+        self,
+        db: Session,
+        statement_id: str,
+        data: bytes,
+        mode: str = "mid",
+        skip: Iterable[str] = (),
+        progress: Optional[Progress] = None,
+        parser: Optional[StatementParser] = None,
+    ):
+        self.skip = frozenset(skip)
+        unknown = self.skip - SKIPPABLE
+        if unknown:
+            raise ValueError(f"Stages {sorted(unknown)} can't be skipped; skippable: {sorted(SKIPPABLE)}")
+        self.db = db
+        self.statement_id = statement_id
+        self.data = data
+        self.parser = parser
+        self.mode = mode
+        self.progress = progress or _noop
+        self.timings: Dict[str, float] = {}
+
+        self.extracted: Iterator[Dict] = iter(())
+        self.period: Optional[Dict[str, str]] = None
+        self.batches: Iterator[List[Dict]] = iter(())
+        self.spool: Optional[BatchSpool] = None
+        self.row_count = 0
+        self.spend = SpendSummary()
+        self.summary: Dict[str, Dict[str, float]] = {}
+        self.uncategorized_total = 0.0
+        self.report: Optional[Dict] = None
+        self.summaries_upserted = 0
+        self.analysis: Optional[Dict] = None
+
+    # ---- stages ----
+
+    def _extract(self) -> None:
+        """Raises ValueError for unrecognized formats and anything the parser can't read."""
+        if self.parser is None:
+            self.parser = detect(self.data)
+        with _as_value_error():
+            self.period = self.parser.period(self.statement_id, self.data)
+        self.extracted = self._extracted()
+
+    def _extracted(self) -> Iterator[Dict]:
+        with _as_value_error():
+            yield from self.parser.extract(
+                self.statement_id, self.data,
+                progress=lambda done, total: self.progress(pages_parsed=done, pages_total=total),
+            )
+
+    def _parse(self) -> None:
+        self.batches = self._parsed(self.extracted)
+
+    def _parsed(self, txns: Iterator[Dict]) -> Iterator[List[Dict]]:
+        while True:
+            batch = transaction_rows(
+                self.statement_id, islice(txns, BULK_INSERT_BATCH_SIZE), self.parser.name, self.period)
+            if not batch:
+                return
+            yield batch
+
+    def _categorize(self) -> None:
+        if "persist" not in self.skip:
+            self.spool = BatchSpool(PIPELINE_SPOOL_BYTES)
+        for batch in self.batches:
+            self.row_count += len(batch)
+            self.spend.add(batch)
+            if self.spool is not None:
+                self.spool.add(batch)
+        self.summary = self.spend.summary()
+        self.uncategorized_total = self.spend.uncategorized_total
+
+    def _persist(self) -> None:
+        inserted = 0
+
+        def on_batch(entry: Dict) -> None:
+            nonlocal inserted
+            inserted += entry["inserted"]
+            self.progress(rows_inserted=inserted)
+
+        rows = (r for batch in self.spool for r in batch)
+        self.report = stream_insert_transactions(
+            self.db, rows, on_batch=on_batch, on_failed=self.spend.remove)
+        self.close()
+        if self.report["failed"]:
+            # Summaries only cover rows that made it into the table.
+            self.summary = self.spend.summary()
+            self.uncategorized_total = self.spend.uncategorized_total
+        # A re-upload of a statement saved before posted_on existed dates its old rows.
+        # Commit even when nothing was updated: that ends the SELECT's read
+        # transaction, whose stale snapshot would make the summaries write fail
+        # with "database is locked" once another writer has committed.
+        if self.period and self.report["duplicates"]:
+            fill_posted_on(self.db, {self.statement_id: period_dates(self.period)})
+            self.db.commit()
+
+    def _summaries(self) -> None:
+        self.summaries_upserted = upsert_category_summaries(self.db, summary_rows(self.statement_id, self.summary))
+
+    def _emissions(self) -> None:
+        self.analysis = build_analysis(
+            self.statement_id, self.summary, self.uncategorized_total, self.row_count, mode=self.mode)
+
+    # ---- drivers ----
+
+    def _timed(self, stage: str) -> None:
+        t0 = time.perf_counter()
+        getattr(self, f"_{stage}")()
+        self.timings[stage] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def run(self) -> "IngestionRun":
+        """Run every stage in the calling thread (background jobs)."""
+        try:
+            for stage in STAGES:
+                if stage not in self.skip:
+                    self._timed(stage)
+        finally:
+            self.close()
+        return self
+
+    async def arun(self) -> "IngestionRun":
+        """Run every stage off the event loop on its executor lane."""
+        try:
+            for stage in STAGES:
+                if stage in self.skip:
+                    continue
+                lane = run_db if stage in _DB_STAGES else run_parse
+                await lane(self._timed, stage)
+        finally:
+            self.close()
+        return self
+
+    def close(self) -> None:
+        """Free the row spool (persist does this as soon as it's done with it)."""
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+    def stats(self) -> Dict:
+        return {
+            "parser": self.parser.name if self.parser else None,
+            "timings_ms": dict(self.timings),
+            "skipped": [s for s in STAGES if s in self.skip],
+        }
+
+    # ---- response payloads ----
+
+    def save_payload(self) -> Dict:
+        out = save_response(self.statement_id, self.row_count, self.report)
+        out["pipeline"] = self.stats()
+        return out
+
+    def analysis_payload(self) -> Dict:
+        return {**self.analysis, "pipeline": self.stats()}
+
+def save_skips(persist: bool) -> List[str]:
+    """/statements/save: persist transactions + summaries unless persist=false."""
+    return ["emissions"] if persist else ["persist", "summaries", "emissions"]
+
+def analyze_skips(persist: bool) -> List[str]:
+    """/user/analyze: everything; persist=false keeps only the summaries write."""
+    return [] if persist else ["persist"]
+
+# ---- Blocking entry points used by background jobs ----
+
+def save_statement(
+    db: Session,
+    statement_id: str,
+    data: bytes,
+    persist: bool = True,
+    progress: Optional[Progress] = None,
+) -> Dict:
+    run = IngestionRun(db, statement_id, data, skip=save_skips(persist), progress=progress)
+    return run.run().save_payload()
+
+def analyze_statement(
+    db: Session,
+    statement_id: str,
+    data: bytes,
+    mode: str = "mid",
+    persist: bool = True,
+    progress: Optional[Progress] = None,
+) -> Dict:
+    run = IngestionRun(db, statement_id, data, mode=mode, skip=analyze_skips(persist), progress=progress)
+    return run.run().analysis_payload()
+
+def backfill_posted_on(db: Session) -> int:
+    """
+    Date rows saved before transactions.posted_on existed, for statements whose
+    period is in the parse cache. Returns rows updated.
+    """
+    periods = {}
+    for statement_id in statements_missing_posted_on(db):
+        period = lookup_statement_period(statement_id)
+        if period:
+            periods[statement_id] = period_dates(period)
+    updated = fill_posted_on(db, periods)
+    db.commit()
+    return updated
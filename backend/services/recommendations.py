@@ -1,21 +1,152 @@
 # services/recommendations.py
+import asyncio
 import os
 import json
-import boto3
+import threading
+import time
+from concurrent.futures import wait
+from typing import Callable, Dict, List, Optional, Sequence
 import numpy as np
-from qdrant_client import QdrantClient
 from dotenv import load_dotenv
+from services.embedding_cache import EmbedFn, EmbeddingCache
+from services.executors import embed_lane, run_net
+from services.vector_store import VECTOR_BACKEND, VectorStore, make_vector_store
 
 load_dotenv()
 
+EMBEDDING_MODEL_ID = os.getenv("EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0")
+MAX_RECOMMENDATION_CATEGORIES = 2
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "8"))  # texts per embed_batch_fn call
+RECOMMENDATION_CONCURRENCY = int(os.getenv("RECOMMENDATION_CONCURRENCY", "4"))
+RECOMMENDATION_TIMEOUT = float(os.getenv("RECOMMENDATION_TIMEOUT", "5"))  # seconds per embed/search call
+# Maximal marginal relevance: 1.0 = pure relevance, 0.0 = pure diversity.
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_CANDIDATES = int(os.getenv("MMR_CANDIDATES", "8"))
+
+# boto3 and qdrant_client take ~2s to import and the clients open connections,
+# so both are deferred until the first recommendation request (or an explicit
+# warm-up via the readiness probe) instead of being paid by every worker boot.
+
+def mmr_select(query_vector, candidates: np.ndarray, k: int, lam: float = MMR_LAMBDA) -> list:
+    """
+    Greedy MMR over candidate vectors (n, dim). Relevance and all pairwise
+    similarities come from one normalized float32 matrix product; returns the
+    selected row indices in pick order.
+    """
+    cand = np.asarray(candidates, dtype=np.float32)
+    n = cand.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+    q = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+    m = np.vstack([q, cand])
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    m /= np.where(norms == 0, 1, norms)
+    sims = m[1:] @ m.T          # (n, n + 1): column 0 = query relevance
+    relevance, pairwise = sims[:, 0], sims[:, 1:]
+
+    selected = [int(np.argmax(relevance))]
+    max_sim = pairwise[selected[0]].copy()
+    for _ in range(k - 1):
+        scores = lam * relevance - (1.0 - lam) * max_sim
+        scores[selected] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        np.maximum(max_sim, pairwise[pick], out=max_sim)
+    return selected
+
 class CarbonRecommendationEngine:
-    def __init__(self):
-        self.qdrant = QdrantClient(
-            url=os.getenv("QDRANT_URL"),
-            api_key=os.getenv("QDRANT_API_KEY"),
-        )
+    def __init__(
+        self,
+        embed_fn: Optional[EmbedFn] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        model_id: str = EMBEDDING_MODEL_ID,
+        vector_store: Optional[VectorStore] = None,
+        embed_batch_fn: Optional[Callable[[List[str]], List[Sequence[float]]]] = None,
+    ):
+        """
+        embed_fn: text -> vector, defaults to Bedrock (pass a stub for offline use).
+        embedding_cache: defaults to the persistent store under data/.
+        vector_store: defaults to the VECTOR_BACKEND store (Qdrant or the local index).
+        embed_batch_fn: texts -> vectors for providers with a batch endpoint;
+            without one, get_embeddings calls embed_fn per text concurrently.
+        """
         self.collection = os.getenv("COLLECTION_NAME", "carbon_footprint_bedrock")
-        self.bedrock = boto3.client('bedrock-runtime', region_name=os.getenv("AWS_REGION", "us-east-1"))
+        self.model_id = model_id
+        self.embed_fn = embed_fn or self._bedrock_embedding
+        self.embed_batch_fn = embed_batch_fn
+        self.embedding_cache = embedding_cache if embedding_cache is not None else EmbeddingCache()
+        self.vector_store = vector_store if vector_store is not None else make_vector_store(VECTOR_BACKEND, lambda: self.qdrant, self.collection)
+        self._qdrant = None
+        self._bedrock = None
+        self._lock = threading.Lock()
+        self.init_seconds: Dict[str, float] = {}
+        self.init_errors: Dict[str, str] = {}
+
+    def _init_client(self, name: str, factory):
+        t0 = time.perf_counter()
+        try:
+            client = factory()
+        except Exception as e:
+            self.init_errors[name] = str(e)
+            raise
+        self.init_errors.pop(name, None)
+        self.init_seconds[name] = round(time.perf_counter() - t0, 3)
+        print(f"🔌 {name} client ready in {self.init_seconds[name]}s")
+        return client
+
+    @property
+    def qdrant(self):
+        if self._qdrant is None:
+            with self._lock:
+                if self._qdrant is None:
+                    def factory():
+                        from qdrant_client import QdrantClient
+                        return QdrantClient(
+                            url=os.getenv("QDRANT_URL"),
+                            api_key=os.getenv("QDRANT_API_KEY"),
+                        )
+                    self._qdrant = self._init_client("qdrant", factory)
+        return self._qdrant
+
+    @property
+    def bedrock(self):
+        if self._bedrock is None:
+            with self._lock:
+                if self._bedrock is None:
+                    def factory():
+                        import boto3
+                        return boto3.client('bedrock-runtime', region_name=os.getenv("AWS_REGION", "us-east-1"))
+                    self._bedrock = self._init_client("bedrock", factory)
+        return self._bedrock
+
+    def readiness(self, warm: bool = False) -> Dict:
+        """
+        Client state for the readiness probe. With warm=True, constructs any
+        missing clients (blocking) and reports whether that succeeded.
+        """
+        needed = (["bedrock"] if self.embed_fn == self._bedrock_embedding else []) + \
+                 (["qdrant"] if self.vector_store.name == "qdrant" else [])
+        if warm:
+            for name in needed:
+                try:
+                    getattr(self, name)
+                except Exception as e:
+                    print(f"❌ {name} init error: {e}")
+        clients = {
+            "qdrant": self._qdrant is not None,
+            "bedrock": self._bedrock is not None,
+        }
+        store_ready = self.vector_store.ready()
+        return {
+            "ready": store_ready and all(clients[n] for n in needed),
+            "configured": bool(os.getenv("QDRANT_URL")) if self.vector_store.name == "qdrant" else store_ready,
+            "vector_backend": self.vector_store.name,
+            "clients": clients,
+            "init_seconds": dict(self.init_seconds),
+            "errors": dict(self.init_errors),
+            "embedding_cache": self.embedding_cache.stats(),
+        }
     
     def _safe_extract_text(self, payload) -> str:
         """Safely extract and clean text from payload, handling binary data"""
@@ -38,127 +169,278 @@ class CarbonRecommendationEngine:
         except Exception:
             return "[Error extracting content]"
     
-    def get_embedding(self, text: str) -> list:
+    def _bedrock_embedding(self, text: str) -> list:
+        response = self.bedrock.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({"inputText": text})
+        )
+        embedding = json.loads(response['body'].read())['embedding']
+        return embedding if embedding else []
+
+    def _embed_batch(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Embed and cache one batch (runs on the embed lane, so late results still get cached)."""
+        if self.embed_batch_fn is not None:
+            raw = list(self.embed_batch_fn(texts))
+        else:
+            raw = []
+            for text in texts:
+                try:
+                    raw.append(self.embed_fn(text))
+                except Exception as e:
+                    print(f"Embedding error: {e}")
+                    raw.append(None)
+        return [
+            self.embedding_cache.put(self.model_id, text, vec) if vec is not None and len(vec) else None
+            for text, vec in zip(texts, raw)
+        ]
+
+    def get_embeddings(self, texts: Sequence[str], timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Embeddings for `texts` as one contiguous float32 (len(texts), dim) array.
+        Duplicates are embedded once, cached vectors are reused and the misses
+        are embedded concurrently on the embed lane, EMBED_BATCH_SIZE per
+        embed_batch_fn call (one text per task with a single-text embed_fn).
+        Rows for texts that failed or didn't finish within `timeout` seconds
+        are zero.
+        """
+        keys = [t[:8000] for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            vec = self.embedding_cache.get(self.model_id, key)
+            if vec is None:
+                misses.append(key)
+            else:
+                found[key] = vec
+
+        if misses:
+            size = EMBED_BATCH_SIZE if self.embed_batch_fn is not None else 1
+            batches = {
+                embed_lane.submit(self._embed_batch, misses[i:i + size]): misses[i:i + size]
+                for i in range(0, len(misses), size)
+            }
+            done, not_done = wait(batches, timeout=timeout)
+            if not_done:
+                print(f"⏱️ {len(not_done)} embedding batch(es) timed out")
+            for fut in done:
+                if fut.exception() is not None:
+                    print(f"Embedding error: {fut.exception()}")
+                    continue
+                for key, vec in zip(batches[fut], fut.result()):
+                    if vec is not None:
+                        found[key] = vec
+
+        dim = next((v.shape[0] for v in found.values()), 0)
+        out = np.zeros((len(keys), dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            vec = found.get(key)
+            if vec is not None and vec.shape[0] == dim:
+                out[i] = vec
+        return out
+
+    def get_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Single-text get_embeddings; None if embedding failed."""
         try:
-            response = self.bedrock.invoke_model(
-                modelId='amazon.titan-embed-text-v2:0',
-                body=json.dumps({"inputText": text[:8000]})
-            )
-            embedding = json.loads(response['body'].read())['embedding']
-            return embedding if embedding else []
+            vec = self.get_embeddings([text])[0]
         except Exception as e:
             print(f"Embedding error: {e}")
-            return []
-    
+            return None
+        return vec if vec.any() else None
+
     def cosine_sim(self, a, b):
         try:
-            return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+            a = np.asarray(a, dtype=np.float32)
+            b = np.asarray(b, dtype=np.float32)
+            return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
         except:
             return 0.0
     
+    def _over_budget_categories(self, analysis_data: dict) -> list:
+        """Over-budget categories from an /user/analyze payload, most over first."""
+        over_budget_categories = []
+        for category, data in analysis_data.get("budget_comparison_by_category", {}).items():
+            if isinstance(data, dict) and data.get("status") == "over":
+                over_budget_categories.append({
+                    "category": str(category),
+                    "over_amount": float(data.get("delta_kg", 0)),
+                    "actual_emission": float(data.get("actual_kg", 0))
+                })
+
+        # Sort by most over budget
+        over_budget_categories.sort(key=lambda x: x["over_amount"], reverse=True)
+        return over_budget_categories[:MAX_RECOMMENDATION_CATEGORIES]
+
+    def _query(self, category: str) -> str:
+        return f"carbon emissions reduction strategies {category.lower()}"
+
+    def _recommendation(self, category_data: dict, docs: list) -> dict:
+        return {
+            "category": category_data["category"],
+            "problem": f"Over budget by {category_data['over_amount']} kg CO2",
+            "suggestions": docs
+        }
+
     def get_recommendations(self, analysis_data: dict, top_k: int = 3) -> list:
         try:
             print("🔄 Starting recommendation generation with real data")
-            
-            # Find over-budget categories
-            over_budget_categories = []
-            for category, data in analysis_data.get("budget_comparison_by_category", {}).items():
-                if isinstance(data, dict) and data.get("status") == "over":
-                    over_budget_categories.append({
-                        "category": str(category),
-                        "over_amount": float(data.get("delta_kg", 0)),
-                        "actual_emission": float(data.get("actual_kg", 0))
-                    })
-            
-            # Sort by most over budget
-            over_budget_categories.sort(key=lambda x: x["over_amount"], reverse=True)
-            
+
             recommendations = []
-            
+            categories = self._over_budget_categories(analysis_data)
+            query_vectors = self.get_embeddings([self._query(c["category"]) for c in categories])
+
             # Get real recommendations for each over-budget category
-            for category_data in over_budget_categories[:2]:
+            for category_data, query_embedding in zip(categories, query_vectors):
                 category = category_data["category"]
-                
-                # Create search query
-                query = f"carbon emissions reduction strategies {category.lower()}"
-                
+                if not query_embedding.any():
+                    continue
+
                 # Get relevant documents using safe search
-                docs = self._safe_mmr_search(query, top_k=2)
-                
+                docs = self._search_docs(query_embedding, top_k=2)
+
                 if docs:
-                    recommendations.append({
-                        "category": category,
-                        "problem": f"Over budget by {category_data['over_amount']} kg CO2",
-                        "suggestions": docs
-                    })
+                    recommendations.append(self._recommendation(category_data, docs))
                     print(f"✅ Found {len(docs)} suggestions for {category}")
-            
+
             print(f"🎯 Generated {len(recommendations)} total recommendations")
             return recommendations
-            
+
         except Exception as e:
             print(f"❌ Error in get_recommendations: {e}")
             return []
-    
+
+    async def aget_recommendations(
+        self,
+        analysis_data: dict,
+        concurrency: int = RECOMMENDATION_CONCURRENCY,
+        timeout: float = RECOMMENDATION_TIMEOUT,
+    ) -> list:
+        """
+        Async get_recommendations: all queries are embedded in one batched
+        call, then the searches for every over-budget category run
+        concurrently (at most `concurrency` at a time). Embedding and each
+        search are bounded by `timeout` seconds; categories that fail or time
+        out are dropped, so a slow category only costs its own suggestions.
+        """
+        print("🔄 Starting recommendation generation with real data")
+        sem = asyncio.Semaphore(max(1, concurrency))
+        categories = self._over_budget_categories(analysis_data)
+        try:
+            query_vectors = await run_net(
+                self.get_embeddings, [self._query(c["category"]) for c in categories], timeout)
+        except Exception as e:
+            print(f"❌ Error in get_recommendations: {e}")
+            return []
+
+        async def one(category_data: dict, query_embedding: np.ndarray) -> Optional[dict]:
+            category = category_data["category"]
+            if not query_embedding.any():
+                print(f"⏱️ No embedding for {category}")
+                return None
+            try:
+                async with sem:
+                    docs = await asyncio.wait_for(
+                        run_net(self._search_docs, query_embedding, 2), timeout)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Recommendation lookup timed out for {category}")
+                return None
+            except Exception as e:
+                print(f"❌ Recommendation lookup failed for {category}: {e}")
+                return None
+            if not docs:
+                return None
+            print(f"✅ Found {len(docs)} suggestions for {category}")
+            return self._recommendation(category_data, docs)
+
+        try:
+            results = await asyncio.gather(*(one(c, v) for c, v in zip(categories, query_vectors)))
+        except Exception as e:
+            print(f"❌ Error in get_recommendations: {e}")
+            return []
+        recommendations = [r for r in results if r]
+        print(f"🎯 Generated {len(recommendations)} total recommendations")
+        return recommendations
+
     def _safe_mmr_search(self, query: str, top_k: int = 2) -> list:
         """Safe MMR search that handles binary data gracefully"""
         try:
             # Get query embedding
             query_embedding = self.get_embedding(query)
-            if not query_embedding:
+            if query_embedding is None:
                 return []
-            
-            # Get initial results - NO VECTORS to avoid binary issues
-            results = self.qdrant.search(
-                collection_name=self.collection,
-                query_vector=query_embedding,
-                limit=10,  # Smaller initial set
-                with_payload=True,
-                with_vectors=False  # Critical: no binary vector data
-            )
-            
+            return self._search_docs(query_embedding, top_k)
+        except Exception as e:
+            print(f"❌ Safe search error: {e}")
+            return []
+
+    def _source_diverse(self, results: list, top_k: int) -> list:
+        """Fallback when the store returned no vectors: at most one hit per source."""
+        selected_indices = []
+        sources_used = set()
+
+        for i, result in enumerate(results):
+            if len(selected_indices) >= top_k:
+                break
+
+            source = str(result["payload"].get('source', ''))
+
+            # Basic diversity: don't pick multiple from same source
+            if source not in sources_used:
+                selected_indices.append(i)
+                sources_used.add(source)
+            elif not selected_indices:  # Ensure we have at least one
+                selected_indices.append(i)
+        return selected_indices
+
+    def _search_docs(self, query_embedding, top_k: int = 2) -> list:
+        """Vector search + MMR reranking, formatted as suggestion dicts."""
+        try:
+            results = self.vector_store.search(query_embedding, limit=MMR_CANDIDATES, with_vectors=True)
+
             if not results:
                 return []
-            
-            # Simple diversity selection (no vector math)
-            selected_indices = []
-            sources_used = set()
-            
-            for i, result in enumerate(results):
-                if len(selected_indices) >= top_k:
-                    break
-                    
-                source = str(result.payload.get('source', ''))
-                
-                # Basic diversity: don't pick multiple from same source
-                if source not in sources_used:
-                    selected_indices.append(i)
-                    sources_used.add(source)
-                elif not selected_indices:  # Ensure we have at least one
-                    selected_indices.append(i)
-            
+
+            vectors = [r.get("vector") for r in results]
+            if all(v is not None for v in vectors):
+                selected_indices = mmr_select(query_embedding, np.stack(vectors), top_k, MMR_LAMBDA)
+            else:
+                selected_indices = self._source_diverse(results, top_k)
+
             # Format safe results
             safe_docs = []
             for idx in selected_indices[:top_k]:
-                result = results[idx]
-                payload = result.payload
-                
+                payload = results[idx]["payload"]
+
                 # Safely extract and clean text
                 clean_text = self._safe_extract_text(payload)
                 if len(clean_text) > 200:
                     clean_text = clean_text[:200] + '...'
-                
+
                 safe_docs.append({
                     'source': str(payload.get('source', 'Unknown')),
                     'advice': clean_text,
                     'pages': str(payload.get('page_range', 'N/A'))
                 })
-            
+
             return safe_docs
-            
+
         except Exception as e:
             print(f"❌ Safe search error: {e}")
             return []
 
-# Global instance
-recommendation_engine = CarbonRecommendationEngine()
\ No newline at end of file
+_engine: Optional[CarbonRecommendationEngine] = None
+_engine_lock = threading.Lock()
+
+def get_recommendation_engine() -> CarbonRecommendationEngine:
+    """Process-wide engine, created on first use (clients are created lazily too)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = CarbonRecommendationEngine()
+    return _engine
+
+def __getattr__(name: str):
+    # Backwards compatible `from services.recommendations import recommendation_engine`
+    if name == "recommendation_engine":
+        return get_recommendation_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,35 +1,223 @@
-from typing import Iterable, Dict
+import os
+import time
+from itertools import islice
+from operator import itemgetter
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from utils.text import posted_on
+
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))
+
+INSERT_TRANSACTION_SQL = text("""
+    INSERT OR IGNORE INTO transactions
+      (statement_id, date, description, amount, balance, category, subcategory, source, posted_on)
+    VALUES
+      (:statement_id, :date, :description, :amount, :balance, :category, :subcategory, :source, :posted_on)
+""")
+
+# Same statement for the batch path: positional rows through the DB-API
+# executemany skip SQLAlchemy's per-row bind processing (~1.5x faster).
+TRANSACTION_COLUMNS = (
+    "statement_id", "date", "description", "amount", "balance", "category", "subcategory", "source", "posted_on",
+)
+INSERT_TRANSACTION_ROWS_SQL = (
+    f"INSERT OR IGNORE INTO transactions ({', '.join(TRANSACTION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TRANSACTION_COLUMNS))})"
+)
+_row_values = itemgetter(*TRANSACTION_COLUMNS)
+_txn_key = itemgetter("statement_id", "date", "description", "amount")  # uq_txn_key
+
+BUMP_VERSION_SQL = text("""
+    INSERT INTO statement_versions (statement_id, version, updated_at)
+    VALUES (:statement_id, 1, :now)
+    ON CONFLICT(statement_id)
+    DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+""")
+
+# statement_aggregates maintenance. The totals-row INSERT OR IGNORE is the first
+# statement of each batch SAVEPOINT: it takes the write lock before MAX(id) is
+# read, so the "id > max_id" window is exactly the rows this batch inserted.
+TOTAL_KEY = "*"
+
+ENSURE_TOTALS_SQL = text("""
+    INSERT OR IGNORE INTO statement_aggregates (statement_id, category, subcategory, spend, txn_count)
+    VALUES (:statement_id, '*', '*', 0.0, 0)
+""")
+MAX_TRANSACTION_ID_SQL = text("SELECT COALESCE(MAX(id), 0) FROM transactions")
+_ACCUMULATE_SQL = """
+    INSERT INTO statement_aggregates (statement_id, category, subcategory, spend, txn_count)
+    SELECT statement_id, {keys}, SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), COUNT(*)
+    FROM transactions
+    WHERE {where}
+    GROUP BY statement_id{group_by}
+    ON CONFLICT(statement_id, category, subcategory)
+    DO UPDATE SET spend = spend + excluded.spend, txn_count = txn_count + excluded.txn_count
+"""
+
+def _accumulate_sql(where: str) -> List:
+    """Per-subcategory and totals upserts over the transactions matching `where`."""
+    return [
+        text(_ACCUMULATE_SQL.format(
+            keys="COALESCE(category, ''), COALESCE(subcategory, '')", where=where,
+            group_by=", COALESCE(category, ''), COALESCE(subcategory, '')")),
+        text(_ACCUMULATE_SQL.format(keys="'*', '*'", where=where, group_by="")),
+    ]
+
+ACCUMULATE_NEW_ROWS_SQL = _accumulate_sql("id > :max_id")
+# Statements saved before statement_aggregates existed (no totals row yet).
+BACKFILL_SQL = _accumulate_sql(
+    "statement_id NOT IN (SELECT statement_id FROM statement_aggregates WHERE category = '*')")
+
+def _insert_batch(db: Session, params: List[Dict], sort: bool = False) -> int:
+    """
+    Insert one batch, fold the rows actually inserted into statement_aggregates
+    and bump the statement version (invalidates the analytics cache).
+    sort=True inserts in uq_txn_key order, so the unique index is appended to
+    instead of updated at random pages (faster for large batches, but ids no
+    longer follow statement order within the batch).
+    """
+    db.execute(ENSURE_TOTALS_SQL, [{"statement_id": sid} for sid in {p["statement_id"] for p in params}])
+    max_id = db.execute(MAX_TRANSACTION_ID_SQL).scalar()
+    if sort:
+        params = sorted(params, key=_txn_key)
+    res = db.connection().exec_driver_sql(INSERT_TRANSACTION_ROWS_SQL, [_row_values(p) for p in params])
+    if res.rowcount:
+        for sql in ACCUMULATE_NEW_ROWS_SQL:
+            db.execute(sql, {"max_id": max_id})
+        bump_statement_versions(db, (p["statement_id"] for p in params))
+    return res.rowcount
+
+def backfill_statement_aggregates(db: Session) -> int:
+    """Build aggregates for statements saved before the table existed. Returns statements backfilled."""
+    res = db.execute(BACKFILL_SQL[0])
+    if res.rowcount:
+        res = db.execute(BACKFILL_SQL[1])
+    db.commit()
+    return max(res.rowcount, 0)
+
+def get_statement_aggregates(db: Session, statement_id: str) -> List[tuple]:
+    """[(category, subcategory, spend, txn_count)] including the ("*", "*") totals row."""
+    return db.execute(text("""
+        SELECT category, subcategory, spend, txn_count
+        FROM statement_aggregates
+        WHERE statement_id = :sid
+    """), {"sid": statement_id}).fetchall()
+
+def bump_statement_versions(db: Session, statement_ids: Iterable[str]) -> None:
+    """Increment the version of each statement (no commit; call inside the writing transaction)."""
+    now = time.time()
+    params = [{"statement_id": sid, "now": now} for sid in sorted(set(statement_ids))]
+    if params:
+        db.execute(BUMP_VERSION_SQL, params)
+
+def get_statement_version(db: Session, statement_id: str) -> Optional[int]:
+    row = db.execute(
+        text("SELECT version FROM statement_versions WHERE statement_id = :sid"),
+        {"sid": statement_id},
+    ).fetchone()
+    return row[0] if row else None
+
+def statements_missing_posted_on(db: Session) -> List[str]:
+    """statement_ids with rows saved before transactions.posted_on existed."""
+    rows = db.execute(text("SELECT DISTINCT statement_id FROM transactions WHERE posted_on IS NULL"))
+    return [r[0] for r in rows]
+
+def fill_posted_on(db: Session, periods: Dict[str, Tuple[date, date]]) -> int:
+    """
+    Date each statement's rows that have no posted_on from its (start, end)
+    period, bumping its version. No commit. Returns rows updated.
+    """
+    updated = 0
+    for statement_id, period in periods.items():
+        rows = db.execute(
+            text("SELECT id, date FROM transactions WHERE statement_id = :sid AND posted_on IS NULL"),
+            {"sid": statement_id},
+        ).fetchall()
+        params = [{"id": i, "posted_on": posted_on(d, period)} for i, d in rows]
+        params = [p for p in params if p["posted_on"]]
+        if params:
+            db.execute(text("UPDATE transactions SET posted_on = :posted_on WHERE id = :id"), params)
+            bump_statement_versions(db, [statement_id])
+            updated += len(params)
+    return updated
+
+def _batched(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def stream_insert_transactions(
+    db: Session,
+    rows: Iterable[Dict],
+    batch_size: int = BULK_INSERT_BATCH_SIZE,
+    on_batch: Optional[Callable[[Dict], None]] = None,
+    sort_batches: bool = False,
+    on_failed: Optional[Callable[[List[Dict]], None]] = None,
+) -> Dict:
+    """
+    Insert rows from any iterable (e.g. a generator over a statement) in
+    batches of `batch_size` with 'INSERT OR IGNORE', so duplicates on
+    uq_txn_key are skipped. Only one batch is held in memory at a time.
+
+    All batches share one transaction; each batch runs in its own SAVEPOINT,
+    so a batch with bad data is rolled back and reported (and passed to
+    `on_failed`) without losing the rest. OperationalError (database locked
+    or busy, disk I/O) isn't about the batch's data: it rolls back the whole
+    transaction and is raised. statement_aggregates is updated in the same
+    SAVEPOINT from the rows that were actually inserted, so duplicates are
+    never double counted.
+    Returns totals plus a per-batch report; `on_batch` gets each batch entry.
+    sort_batches: see _insert_batch.
+    """
+    report = {"seen": 0, "inserted": 0, "duplicates": 0, "failed": 0, "batches": []}
+
+    for n, batch in enumerate(_batched(rows, max(1, batch_size))):
+        params = [{"balance": None, "source": None, "posted_on": None, **r} for r in batch]
+        entry = {"batch": n, "seen": len(params), "inserted": 0, "duplicates": 0}
+        try:
+            with db.begin_nested():
+                inserted = _insert_batch(db, params, sort_batches)
+            entry["inserted"] = inserted
+            entry["duplicates"] = len(params) - inserted
+        except OperationalError:
+            db.rollback()
+            raise
+        except SQLAlchemyError as e:
+            entry["error"] = str(e.orig if getattr(e, "orig", None) else e)
+            report["failed"] += len(params)
+            if on_failed:
+                on_failed(batch)
+
+        report["seen"] += entry["seen"]
+        report["inserted"] += entry["inserted"]
+        report["duplicates"] += entry["duplicates"]
+        report["batches"].append(entry)
+        if on_batch:
+            on_batch(entry)
+
+    db.commit()
+    return report
 
 def bulk_insert_transactions(db: Session, rows: Iterable[Dict]) -> int:
     """
     Efficiently insert rows with SQLite 'INSERT OR IGNORE' so duplicates are skipped.
     Returns number of inserted rows.
     """
-    rows = list(rows)
-    if not rows:
-        return 0
+    return stream_insert_transactions(db, rows)["inserted"]
 
-    for r in rows:
-        r.setdefault("balance", None)
-        r.setdefault("source", "chase_pdf")
-
-    sql = text("""
-        INSERT OR IGNORE INTO transactions
-          (date, description, amount, balance, category, subcategory, source)
-        VALUES
-          (:date, :description, :amount, :balance, :category, :subcategory, :source)
-    """)
-    res = db.execute(sql, rows)
-    db.commit()
-    return res.rowcount
-  
 
 def upsert_category_summaries(db: Session, rows: Iterable[Dict]) -> int:
     """
     rows: dicts with keys: statement_id, category, subcategory, amount_usd
-    Uses SQLite ON CONFLICT DO UPDATE (sum overwrite).
+    Uses SQLite ON CONFLICT DO UPDATE (sum overwrite) and bumps the
+    statement versions in the same transaction.
     Returns number of rows affected (inserted+updated).
     """
     rows = list(rows)
@@ -43,5 +231,6 @@ def upsert_category_summaries(db: Session, rows: Iterable[Dict]) -> int:
         DO UPDATE SET amount_usd = excluded.amount_usd
     """)
     res = db.execute(sql, rows)
+    bump_statement_versions(db, (r["statement_id"] for r in rows))
     db.commit()
-    return res.rowcount
\ No newline at end of file
+    return res.rowcount
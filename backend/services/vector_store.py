@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from db.database import DB_DIR
+
+# Vector search backends for the recommendation engine. Every store returns
+# [{"score": float, "payload": {"source", "text", "page_range", ...}}], best
+# first; with_vectors=True adds "vector" (float32 ndarray, or None if the
+# backend couldn't provide one). VECTOR_BACKEND picks the default:
+#   qdrant - remote collection at QDRANT_URL
+#   local  - embedded index under LOCAL_VECTOR_DIR: a float32 memmap of
+#            L2-normalized vectors (vectors.f32) plus payloads.json, searched
+#            brute force in-process (no network hop, works air-gapped)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", os.path.join(DB_DIR, "vector_index"))
+
+class VectorStore(ABC):
+    name = "base"
+
+    @abstractmethod
+    def search(self, query_vector, limit: int = 10, with_vectors: bool = False) -> List[Dict]:
+        ...
+
+    def ready(self) -> bool:
+        return True
+
+class QdrantVectorStore(VectorStore):
+    """Remote Qdrant collection. `client_fn` returns the (lazily created) client."""
+    name = "qdrant"
+
+    def __init__(self, client_fn: Callable, collection: str):
+        self._client_fn = client_fn
+        self.collection = collection
+
+    def search(self, query_vector, limit: int = 10, with_vectors: bool = False) -> List[Dict]:
+        results = self._client_fn().search(
+            collection_name=self.collection,
+            query_vector=np.asarray(query_vector, dtype=np.float64).tolist(),
+            limit=limit,
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        hits = []
+        for r in results:
+            hit = {"score": float(r.score), "payload": r.payload or {}}
+            if with_vectors:
+                hit["vector"] = _as_float32(r.vector)
+            hits.append(hit)
+        return hits
+
+    def scroll(self, batch_size: int = 256) -> Iterable[tuple]:
+        """Yield (vector, payload) for every point in the collection."""
+        client = self._client_fn()
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=self.collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            for p in points:
+                yield p.vector, p.payload or {}
+            if offset is None:
+                break
+
+class LocalVectorStore(VectorStore):
+    """
+    Embedded cosine-similarity index. Vectors are normalized at build time so a
+    search is one float32 matrix-vector product plus a partial sort.
+    """
+    name = "local"
+    VECTORS = "vectors.f32"
+    PAYLOADS = "payloads.json"
+
+    def __init__(self, directory: str = LOCAL_VECTOR_DIR):
+        self.directory = directory
+        self._matrix: Optional[np.ndarray] = None
+        self._payloads: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def ready(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, self.PAYLOADS))
+
+    def _load(self) -> np.ndarray:
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    with open(os.path.join(self.directory, self.PAYLOADS), "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    n, dim = meta["count"], meta["dim"]
+                    self._payloads = meta["payloads"]
+                    self._matrix = (
+                        np.memmap(os.path.join(self.directory, self.VECTORS), dtype=np.float32, mode="r", shape=(n, dim))
+                        if n else np.zeros((0, dim), dtype=np.float32)
+                    )
+        return self._matrix
+
+    def __len__(self) -> int:
+        return self._load().shape[0]
+
+    def search(self, query_vector, limit: int = 10, with_vectors: bool = False) -> List[Dict]:
+        matrix = self._load()
+        if matrix.shape[0] == 0:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        scores = matrix @ (q / norm)
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        hits = [{"score": float(scores[i]), "payload": self._payloads[i]} for i in top]
+        if with_vectors:
+            rows = np.asarray(matrix[top])
+            for hit, row in zip(hits, rows):
+                hit["vector"] = row
+        return hits
+
+    @classmethod
+    def build(cls, directory: str, vectors: Sequence, payloads: Sequence[Dict]) -> "LocalVectorStore":
+        """Write an index from raw vectors + payloads (replacing any existing one)."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(payloads):
+            raise ValueError("vectors must be (n, dim) with one payload per row")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        os.makedirs(directory, exist_ok=True)
+        vec_path = os.path.join(directory, cls.VECTORS)
+        meta_path = os.path.join(directory, cls.PAYLOADS)
+        matrix.tofile(f"{vec_path}.tmp")
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"count": int(matrix.shape[0]), "dim": int(matrix.shape[1]), "payloads": list(payloads)}, f)
+        os.replace(f"{vec_path}.tmp", vec_path)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return cls(directory)
+
+def _as_float32(vector) -> Optional[np.ndarray]:
+    """Decode a vector returned by Qdrant; None if it isn't a plain float list."""
+    if isinstance(vector, dict):  # named vectors: take the first
+        vector = next(iter(vector.values()), None)
+    try:
+        arr = np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    return arr if arr.ndim == 1 and arr.size and np.isfinite(arr).all() else None
+
+def _json_payload(payload: Dict) -> Dict:
+    out = {}
+    for k, v in payload.items():
+        if isinstance(v, bytes):
+            v = v.decode("utf-8", errors="ignore")
+        out[k] = v if isinstance(v, (str, int, float, bool, type(None), list, dict)) else str(v)
+    return out
+
+def export_qdrant_to_local(source: QdrantVectorStore, directory: str = LOCAL_VECTOR_DIR) -> LocalVectorStore:
+    """Snapshot a Qdrant collection into a LocalVectorStore."""
+    vectors, payloads = [], []
+    for vec, payload in source.scroll():
+        if isinstance(vec, dict):  # named vectors: take the first
+            vec = next(iter(vec.values()))
+        vectors.append(vec)
+        payloads.append(_json_payload(payload))
+    print(f"📦 Exported {len(payloads)} points from {source.collection} to {directory}")
+    return LocalVectorStore.build(directory, vectors, payloads)
+
+def make_vector_store(backend: str, qdrant_client_fn: Callable, collection: str) -> VectorStore:
+    if backend == "qdrant":
+        return QdrantVectorStore(qdrant_client_fn, collection)
+    if backend == "local":
+        return LocalVectorStore()
+    raise ValueError(f"Unknown VECTOR_BACKEND {backend!r}; expected 'qdrant' or 'local'")
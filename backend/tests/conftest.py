@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from db.database import Base, make_engine
+from models import orm  # noqa: F401  (registers tables)
+from services import parse_cache
+
+def _pdf(pages):
+    """A minimal text-only PDF, one page per list of lines (Helvetica, 10pt)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 750 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(f"({escaped}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+@pytest.fixture(autouse=True)
+def _parse_cache(tmp_path_factory, monkeypatch):
+    """Every test gets its own empty parse cache, never data/parse_cache."""
+    directory = str(tmp_path_factory.mktemp("parse_cache"))
+    monkeypatch.setattr(parse_cache, "_cache", parse_cache.ParseCache(directory))
+
+@pytest.fixture
+def make_pdf():
+    return _pdf
+
+@pytest.fixture
+def db(tmp_path):
+    """A session on a fresh SQLite file with every table created."""
+    engine = make_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
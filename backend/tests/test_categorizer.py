@@ -0,0 +1,60 @@
+import re
+
+import pytest
+
+from benchmarks.bench_categorizer import SAMPLES, categorize_linear
+from services.categorizer import RULES, categorize_transactions
+
+# Concrete spellings for the rule alternatives that aren't plain keywords.
+EXPANSIONS = {
+    r"aa\.com": ["aa.com"],
+    "trader joe'?s?": ["trader joe", "trader joes", "trader joe's"],
+    "chick-?fil-?a": ["chick-fil-a", "chickfila", "chick-fila"],
+    "domino'?s?": ["domino", "dominos", "domino's"],
+    "drive[- ]?thru": ["drive-thru", "drive thru", "drivethru"],
+    r"disney\+": ["disney+"],
+    "city of .+ water": ["city of tempe water", "city of water"],
+}
+LITERAL_RE = re.compile(r"^[\w &'-]+$")
+
+def _alternatives(pattern: re.Pattern):
+    return pattern.pattern[3:-3].split("|")
+
+def _keywords():
+    out = []
+    for pattern, _, _ in RULES:
+        for alt in _alternatives(pattern):
+            if LITERAL_RE.match(alt):
+                out.append(alt)
+            else:
+                assert alt in EXPANSIONS, f"add a spelling of {alt!r} to EXPANSIONS"
+                out.extend(EXPANSIONS[alt])
+    return sorted(set(out))
+
+KEYWORDS = _keywords()
+
+def _cases(kw):
+    yield kw
+    yield f"Card Purchase 06/15 {kw.upper()} #1234 Tempe AZ Card 4781"
+    yield f"{kw}.com"
+    yield f"{kw}x"            # no word boundary after
+    yield f"x{kw}"            # no word boundary before
+    yield kw[:-1]             # prefix of the keyword only
+    yield f"{kw[:2]} {kw}"    # index key repeated at another word start
+
+@pytest.mark.parametrize("kw", KEYWORDS)
+def test_engine_matches_linear_scan_per_keyword(kw):
+    for desc in _cases(kw):
+        assert categorize_transactions(desc) == categorize_linear(desc), desc
+
+def test_engine_matches_linear_scan_on_keyword_pairs():
+    # Overlapping rules (walmart, best buy, ikea, subway, ...) must keep
+    # first-rule-wins whichever keyword comes first in the description.
+    for a in KEYWORDS:
+        for b in KEYWORDS:
+            desc = f"{a} {b}"
+            assert categorize_transactions(desc) == categorize_linear(desc), desc
+
+def test_engine_matches_linear_scan_on_samples():
+    for desc in SAMPLES:
+        assert categorize_transactions(desc) == categorize_linear(desc), desc
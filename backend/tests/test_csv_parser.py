@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from services.csv_parser import header_columns, iter_csv_transactions, sniff_dialect
+from services.parsers import CsvParser
+
+def _rows(text: str):
+    return list(CsvParser().stream(io.BytesIO(text.encode("utf-8"))))
+
+def test_chase_checking_layout():
+    rows = _rows(
+        "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+        'DEBIT,06/15/2024,"UBER   TRIP HELP.UBER.COM",-23.45,DEBIT_CARD,976.55,,\n'
+        "CREDIT,07/01/2024,PAYROLL ACME,\"1,500.00\",ACH_CREDIT,\"2,476.55\",,\n"
+    )
+    assert rows == [
+        {"date": "06/15", "description": "UBER TRIP HELP.UBER.COM", "amount": -23.45,
+         "balance": 976.55, "posted_on": "2024-06-15"},
+        {"date": "07/01", "description": "PAYROLL ACME", "amount": 1500.0,
+         "balance": 2476.55, "posted_on": "2024-07-01"},
+    ]
+
+def test_chase_card_layout_uses_post_date_and_description_over_memo():
+    rows = _rows(
+        "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+        "06/14/2024,06/16/2024,NETFLIX.COM,Entertainment,Sale,-15.49,monthly\n"
+        "06/20/2024,06/21/2024,Payment Thank You-Mobile,,Payment,200.00,\n"
+    )
+    assert [(r["posted_on"], r["description"], r["amount"], r["balance"]) for r in rows] == [
+        ("2024-06-16", "NETFLIX.COM", -15.49, None),
+        ("2024-06-21", "Payment Thank You-Mobile", 200.0, None),
+    ]
+
+def test_debit_credit_columns():
+    rows = _rows(
+        "Date;Description;Debit;Credit;Balance\n"
+        "2024-06-03;GROCERY OUTLET;42.10;;957.90\n"
+        "2024-06-04;REFUND;;(5.00);962.90\n"
+        "2024-06-05;TRANSFER;-100.00;;862.90\n"
+    )
+    assert [(r["date"], r["amount"]) for r in rows] == [
+        ("06/03", -42.10), ("06/04", 5.0), ("06/05", -100.0),
+    ]
+
+def test_blank_and_unparseable_rows_are_skipped():
+    rows = _rows(
+        "\n"
+        "Posting Date,Description,Amount\n"
+        "06/15/2024,COFFEE,-4.50\n"
+        ",,\n"
+        "not a date,JUNK,-1.00\n"
+        "06/16/2024,,-2.00\n"
+        "06/17/2024,TEA,abc\n"
+        "Total,,-4.50\n"
+    )
+    assert [r["description"] for r in rows] == ["COFFEE"]
+
+def test_windows_1252_export_with_bom_free_header():
+    data = "Posting Date,Description,Amount\n06/15/2024,CAF\xc9 ROUGE,-4.50\n".encode("cp1252")
+    rows = list(CsvParser().stream(io.BytesIO(data)))
+    assert rows[0]["description"] == "CAF\xc9 ROUGE"
+
+def test_sniff_dialect_and_header_roles():
+    assert sniff_dialect("Date|Payee|Withdrawal|Deposit") == "|"
+    assert sniff_dialect("Name,Email,Phone") is None
+    assert header_columns(["Date", "Payee", "Withdrawal", "Deposit"]) == {
+        "date": 0, "description": 1, "debit": 2, "credit": 3,
+    }
+
+def test_unrecognized_header_raises():
+    with pytest.raises(ValueError):
+        list(iter_csv_transactions(["Name,Email\n", "a,b\n"]))
@@ -0,0 +1,28 @@
+from services.embedding_cache import EmbeddingCache
+
+class _CountingConn:
+    def __init__(self, conn):
+        self.conn = conn
+        self.counts = 0
+
+    def execute(self, sql, *args):
+        self.counts += "COUNT(*)" in sql
+        return self.conn.execute(sql, *args)
+
+def test_store_is_trimmed_without_counting_every_put():
+    cache = EmbeddingCache(":memory:", max_entries=10)
+    cache._conn = conn = _CountingConn(cache._conn)
+    for i in range(10):
+        cache.put("m", f"text {i}", [1.0, 2.0])
+    assert conn.counts == 0
+    cache.put("m", "text 10", [1.0, 2.0])
+    assert conn.counts == 1
+    assert cache.stats()["stored"] == 9
+    assert cache.evictions == 2
+
+def test_replacing_a_vector_does_not_evict():
+    cache = EmbeddingCache(":memory:", max_entries=3)
+    for _ in range(5):
+        cache.put("m", "same text", [1.0])
+    assert cache.stats()["stored"] == 1
+    assert cache.evictions == 0
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import event, text
+
+from services import emissions
+from services.emissions import cached_emissions
+from services.repository import upsert_category_summaries
+from utils.lru import LRUCache
+
+SUMMARY = [
+    {"statement_id": "s1", "category": "Travel", "subcategory": "Ride-hailing (Uber, Lyft)", "amount_usd": 100.0},
+    {"statement_id": "s1", "category": "Food", "subcategory": "Groceries", "amount_usd": 50.0},
+]
+
+@pytest.fixture
+def queries(db, monkeypatch):
+    monkeypatch.setattr(emissions, "emissions_cache", LRUCache(8))
+    seen = []
+    engine = db.get_bind()
+
+    def record(_conn, _cursor, statement, *_args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            seen.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+def test_miss_is_one_query_and_hit_is_one_lookup(db, queries):
+    upsert_category_summaries(db, SUMMARY)
+    queries.clear()
+    etag, payload = cached_emissions(db, "s1")
+    assert len(queries) == 1
+    assert etag.endswith('-mid-v1"')
+    assert set(payload["by_category"]) == {"Travel", "Food"}
+
+    queries.clear()
+    assert cached_emissions(db, "s1") == (etag, payload)
+    assert len(queries) == 1 and "statement_versions" in queries[0]
+
+def test_version_bump_recomputes(db, queries):
+    upsert_category_summaries(db, SUMMARY)
+    first, _ = cached_emissions(db, "s1")
+    upsert_category_summaries(db, [{**SUMMARY[0], "amount_usd": 10.0}])
+    etag, payload = cached_emissions(db, "s1")
+    assert etag != first and etag.endswith('-mid-v2"')
+    assert payload["by_category"]["Travel"]["Ride-hailing (Uber, Lyft)"] < 10
+
+def test_summaries_without_version_row(db, queries):
+    upsert_category_summaries(db, SUMMARY)
+    db.execute(text("DELETE FROM statement_versions"))
+    db.commit()
+    etag, _ = cached_emissions(db, "s1")
+    assert etag.endswith('-mid-v0"')
+    assert cached_emissions(db, "s1")[0] == etag
+
+def test_no_summaries(db, queries):
+    assert cached_emissions(db, "missing") is None
@@ -0,0 +1,45 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from services import jobs
+
+LINES_PER_PAGE = 50
+
+def _statement(make_pdf, n_rows):
+    lines = [f"06/{1 + i % 28:02d} Card Purchase Uber Trip {i} -{1 + i % 90}.{i % 100:02d} {10000 - i}.00"
+             for i in range(n_rows)]
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, n_rows, LINES_PER_PAGE)]
+    pages[0] = ["JPMorgan Chase Bank, N.A.", "June 1, 2024 through June 30, 2024"] + pages[0]
+    return make_pdf(pages), len(pages)
+
+@pytest.fixture
+def job_db(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "SessionLocal", sessionmaker(bind=db.get_bind(), autocommit=False, autoflush=False))
+    monkeypatch.setattr(jobs, "JOB_DIR", str(tmp_path))
+    return db
+
+def _wait(db, statement_id, kind, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.rollback()
+        job = jobs.get_job(db, statement_id, kind)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job still {job['status']} after {timeout}s")
+
+def test_job_over_one_insert_batch_runs_to_completion(job_db, make_pdf):
+    n_rows = 2500  # > BULK_INSERT_BATCH_SIZE, so the insert spans several batches
+    data, n_pages = _statement(make_pdf, n_rows)
+    jobs.enqueue(job_db, "big", "save", data)
+    job = _wait(job_db, "big", "save")
+
+    assert job["error"] is None
+    assert job["status"] == "done"
+    assert job["result"]["inserted_rows"] == n_rows
+    assert job["result"]["failed_rows"] == 0
+    assert job["progress"] == {"pages_parsed": n_pages, "pages_total": n_pages, "rows_inserted": n_rows}
+    assert job_db.execute(text("SELECT COUNT(*) FROM transactions")).scalar() == n_rows
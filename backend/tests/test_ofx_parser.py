@@ -0,0 +1,85 @@
+import io
+
+import pytest
+
+from services import parsers
+from services.ofx_parser import iter_ofx_transactions, ofx_period
+
+SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD
+<BANKTRANLIST>
+<DTSTART>20240614120000[0:GMT]
+<DTEND>20240715120000[0:GMT]
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240615120000[0:GMT]
+<TRNAMT>-23.45
+<FITID>1
+<NAME>UBER TRIP HELP.UBER.COM
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240616
+<TRNAMT>-60.10
+<FITID>2
+<MEMO>SHELL OIL 57444
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240701
+<TRNAMT>1500.00
+<FITID>3
+<NAME>PAYROLL ACME
+</BANKTRANLIST>
+<LEDGERBAL><BALAMT>1234.00<DTASOF>20240715
+</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<?OFX OFXHEADER="200" VERSION="220"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST><DTSTART>20240601</DTSTART><DTEND>20240630</DTEND>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240603</DTPOSTED><TRNAMT>-12.00</TRNAMT><NAME>NETFLIX.COM</NAME></STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240604</DTPOSTED><TRNAMT>-80.00</TRNAMT><NAME>WALMART STORE 1234</NAME></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+SGML_ROWS = [
+    {"date": "06/15", "description": "UBER TRIP HELP.UBER.COM", "amount": -23.45,
+     "balance": None, "posted_on": "2024-06-15"},
+    {"date": "06/16", "description": "SHELL OIL 57444", "amount": -60.10,
+     "balance": None, "posted_on": "2024-06-16"},
+    {"date": "07/01", "description": "PAYROLL ACME", "amount": 1500.0,
+     "balance": None, "posted_on": "2024-07-01"},
+]
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_sgml_unclosed_stmttrn():
+    assert list(iter_ofx_transactions([SGML])) == SGML_ROWS
+
+@pytest.mark.parametrize("size", [1, 3, 7, 16, 64])
+def test_sgml_tags_split_across_chunks(size):
+    assert list(iter_ofx_transactions(_chunks(SGML, size))) == SGML_ROWS
+
+def test_stmttrn_tag_split_at_chunk_boundary():
+    cut = SGML.index("<STMTTRN>", SGML.index("<STMTTRN>") + 1) + 4  # "<STM" | "TTRN>"
+    assert list(iter_ofx_transactions([SGML[:cut], SGML[cut:]])) == SGML_ROWS
+
+def test_stream_reads_in_chunks(monkeypatch):
+    monkeypatch.setattr(parsers, "STREAM_CHUNK_CHARS", 5)
+    rows = list(parsers.OfxParser().stream(io.BytesIO(SGML.encode("cp1252"))))
+    assert rows == SGML_ROWS
+
+def test_xml_ofx():
+    rows = list(iter_ofx_transactions(_chunks(XML, 10)))
+    assert [(r["posted_on"], r["description"], r["amount"]) for r in rows] == [
+        ("2024-06-03", "NETFLIX.COM", -12.0),
+        ("2024-06-04", "WALMART STORE 1234", -80.0),
+    ]
+
+def test_period():
+    assert ofx_period(SGML) == ("2024-06-14", "2024-07-15")
+    assert ofx_period(XML) == ("2024-06-01", "2024-06-30")
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services.parse_cache import ParseCache
+
+def _files(path):
+    return sorted(os.listdir(path))
+
+def test_import_does_not_touch_the_cache_dir(tmp_path):
+    directory = tmp_path / "parse_cache"
+    env = dict(os.environ, PARSE_CACHE_DIR=str(directory))
+    subprocess.run([sys.executable, "-c", "import services.parsers"], env=env, check=True)
+    assert not directory.exists()
+
+def test_round_trip_through_disk(tmp_path):
+    ParseCache(str(tmp_path)).put("s1", "extract_transactions", [{"amount": -1.0}])
+    fresh = ParseCache(str(tmp_path))
+    assert list(fresh.get("s1", "extract_transactions")) == [{"amount": -1.0}]
+    assert fresh.disk_hits == 1
+    assert fresh.get("s1", "extract_transactions") == [{"amount": -1.0}]  # now in memory
+    assert fresh.get("s2", "extract_transactions") is None
+
+def test_other_versions_are_dropped_at_startup(tmp_path):
+    ParseCache(str(tmp_path), version=1).put("s1", "statement_period", [])
+    cache = ParseCache(str(tmp_path), version=2)
+    assert _files(tmp_path) == []
+    assert cache.get("s1", "statement_period") is None
+
+def test_prune_only_when_bound_is_crossed(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), disk_entries=10)
+    scans = []
+    prune = cache._prune
+    monkeypatch.setattr(cache, "_prune", lambda keep: scans.append(keep) or prune(keep))
+    for i in range(10):
+        cache.put(f"s{i}", "statement_period", [])
+    cache.put("s0", "statement_period", [])  # overwrite, not a new file
+    assert scans == []
+    cache.put("s10", "statement_period", [])
+    assert scans == [9]
+    assert len(_files(tmp_path)) == 9
+    assert cache.disk_evictions == 2
+
+def test_large_entries_stay_on_disk_only(tmp_path):
+    cache = ParseCache(str(tmp_path), memory_rows=3)
+    cache.put("small", "extract_transactions", [{"i": i} for i in range(3)])
+    cache.put("big", "extract_transactions", [{"i": i} for i in range(4)])
+    assert ("small", "extract_transactions", cache.version) in cache.memory
+    assert ("big", "extract_transactions", cache.version) not in cache.memory
+    assert [r["i"] for r in cache.get("big", "extract_transactions")] == [0, 1, 2, 3]
+    assert ("big", "extract_transactions", cache.version) not in cache.memory
+
+def test_unfinished_entry_is_not_cached(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    rows = (dict(i=i) for i in range(3))
+    with pytest.raises(RuntimeError):
+        with cache.writer("s1", "extract_transactions") as w:
+            for r in rows:
+                w.add(r)
+            raise RuntimeError("parse failed")
+    assert _files(tmp_path) == []
+    assert cache.get("s1", "extract_transactions") is None
@@ -0,0 +1,57 @@
+import pytest
+
+from services.parsers import (
+    PARSERS, StatementParser, UnsupportedStatement, accepts_filename, detect, supported_extensions,
+)
+
+CSV = b"Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\nDEBIT,06/15/2024,UBER,-23.45,DEBIT_CARD,976.55,,\n"
+OFX = b"OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKTRANLIST><STMTTRN><DTPOSTED>20240615<TRNAMT>-1.00<NAME>X\n"
+
+def test_registry_order():
+    assert [p.name for p in PARSERS] == ["chase_pdf", "ofx", "csv", "pdf"]
+
+def test_base_parser_is_abstract():
+    with pytest.raises(TypeError):
+        StatementParser()
+
+def test_detect_text_formats():
+    assert detect(CSV).name == "csv"
+    assert detect(OFX).name == "ofx"
+    assert detect(b"\xef\xbb\xbf" + CSV, streaming=True).name == "csv"
+
+def test_detect_ofx_before_csv():
+    # An OFX body that also looks like a delimited header must still be OFX.
+    assert detect(b"OFXHEADER:100\nDate,Description,Amount\n").name == "ofx"
+
+def test_detect_chase_pdf(make_pdf):
+    pdf = make_pdf([["JPMorgan Chase Bank, N.A.", "June 14, 2024 through July 15, 2024"]])
+    assert detect(pdf).name == "chase_pdf"
+
+def test_non_chase_pdf_falls_back_to_generic_parser(make_pdf):
+    pdf = make_pdf([["Wells Fargo Everyday Checking", "06/15 Coffee Shop -4.50 995.50"]])
+    parser = detect(pdf)
+    assert parser.name == "pdf"
+    assert list(parser.extract("wf", pdf)) == [
+        {"date": "06/15", "description": "Coffee Shop", "amount": -4.5, "balance": 995.5},
+    ]
+
+def test_corrupt_pdf_fails_to_extract():
+    parser = detect(b"%PDF-1.4 not really a pdf")
+    assert parser.name == "pdf"
+    with pytest.raises(Exception):
+        list(parser.extract("bad", b"%PDF-1.4 not really a pdf"))
+
+def test_pdf_is_rejected_when_streaming(make_pdf):
+    pdf = make_pdf([["JPMorgan Chase Bank, N.A."]])
+    with pytest.raises(UnsupportedStatement, match="supported formats: ofx, csv"):
+        detect(pdf, streaming=True)
+
+def test_unrecognized_file_is_rejected():
+    with pytest.raises(UnsupportedStatement):
+        detect(b"Name,Email\nann,ann@example.com\n")
+
+def test_streaming_extensions():
+    assert supported_extensions(streaming=True) == (".ofx", ".qfx", ".csv", ".txt")
+    assert accepts_filename("june.PDF")
+    assert not accepts_filename("june.pdf", streaming=True)
+    assert accepts_filename("june.qfx", streaming=True)
@@ -0,0 +1,45 @@
+import sqlite3
+
+from services.parsers import StatementParser
+from services.pipeline import IngestionRun, save_skips
+from services.repository import TOTAL_KEY, get_statement_aggregates
+
+MERCHANTS = ["UBER TRIP", "WALMART STORE", "NETFLIX.COM", "SHELL OIL", "RANDOM SHOP"]
+
+class ListParser(StatementParser):
+    """Yields n rows, calling `check` at every row (while the pipeline is parsing)."""
+    name = "test"
+
+    def __init__(self, n, check):
+        self.n = n
+        self.check = check
+
+    def sniff(self, sample):
+        return False
+
+    def extract(self, statement_id, data, progress=None):
+        for i in range(self.n):
+            self.check()
+            yield {"date": f"06/{1 + i % 28:02d}", "description": f"{MERCHANTS[i % 5]} {i}",
+                   "amount": -1.0 - i % 40, "balance": None}
+
+def test_parse_runs_outside_the_write_transaction(db, tmp_path):
+    other = sqlite3.connect(tmp_path / "app.db", timeout=0, isolation_level=None)
+
+    def write_lock_is_free():
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+
+    n = 2500  # several insert batches
+    run = IngestionRun(db, "s1", b"", skip=save_skips(True), parser=ListParser(n, write_lock_is_free)).run()
+    other.close()
+
+    assert run.report["inserted"] == n
+    assert run.row_count == n
+
+    # The saved summaries agree with the aggregates built from inserted rows.
+    aggregates = {(c, s): spend for c, s, spend, _ in get_statement_aggregates(db, "s1")}
+    assert aggregates[TOTAL_KEY, TOTAL_KEY] == sum(1.0 + i % 40 for i in range(n))
+    for cat, subs in run.summary.items():
+        for sub, amount in subs.items():
+            assert round(aggregates[cat, sub], 2) == amount
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from services.ingestion import SpendSummary
+from services.repository import TOTAL_KEY, get_statement_aggregates, stream_insert_transactions
+
+CATEGORIES = [("Travel", "Ride-hailing"), ("Food", "Groceries"), ("Uncategorized", "Uncategorized")]
+
+def _rows(n, statement_id="s1", start=0):
+    return [{
+        "statement_id": statement_id, "date": "06/15", "description": f"UBER TRIP {i}",
+        # every 4th row is a deposit, which counts as a transaction but not as spend
+        "amount": (1.0 if i % 4 == 0 else -1.0) * (1 + i % 50),
+        "balance": None, "category": CATEGORIES[i % 3][0], "subcategory": CATEGORIES[i % 3][1],
+        "source": "csv", "posted_on": "2024-06-15",
+    } for i in range(start, start + n)]
+
+def _count(db):
+    return db.execute(text("SELECT COUNT(*) FROM transactions")).scalar()
+
+def _aggregates(db, statement_id):
+    return {(c, s): (round(spend, 2), n) for c, s, spend, n in get_statement_aggregates(db, statement_id)}
+
+def _from_table(db, statement_id):
+    """What statement_aggregates should hold, recomputed from the transactions table."""
+    out = {}
+    for c, s, spend, n in db.execute(text("""
+        SELECT category, subcategory, SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), COUNT(*)
+        FROM transactions WHERE statement_id = :sid GROUP BY category, subcategory
+    """), {"sid": statement_id}):
+        out[(c, s)] = (round(spend, 2), n)
+    if out:
+        out[(TOTAL_KEY, TOTAL_KEY)] = (round(sum(v[0] for v in out.values()), 2), sum(v[1] for v in out.values()))
+    return out
+
+@pytest.mark.parametrize("sort_batches", [False, True])
+def test_duplicates_are_skipped_and_not_double_counted(db, sort_batches):
+    first = stream_insert_transactions(db, _rows(2500), sort_batches=sort_batches)
+    assert (first["seen"], first["inserted"], first["duplicates"]) == (2500, 2500, 0)
+    assert len(first["batches"]) == 3
+
+    # 500 already saved + 1000 new, spread over batch boundaries
+    again = stream_insert_transactions(db, _rows(1500, start=2000), batch_size=700, sort_batches=sort_batches)
+    assert (again["seen"], again["inserted"], again["duplicates"], again["failed"]) == (1500, 1000, 500, 0)
+    assert [b["duplicates"] for b in again["batches"]] == [500, 0, 0]
+
+    assert _count(db) == 3500
+    assert _aggregates(db, "s1") == _from_table(db, "s1")
+    assert _aggregates(db, "s1")[TOTAL_KEY, TOTAL_KEY][1] == 3500
+
+def test_duplicates_within_one_batch(db):
+    rows = _rows(3)
+    report = stream_insert_transactions(db, rows + rows + _rows(2, statement_id="s2"))
+    assert (report["inserted"], report["duplicates"]) == (5, 3)
+    assert _aggregates(db, "s1") == _from_table(db, "s1")
+    assert _aggregates(db, "s2") == _from_table(db, "s2")
+    assert _aggregates(db, "s1")[TOTAL_KEY, TOTAL_KEY][1] == 3
+
+def test_bad_batch_is_skipped_and_reported(db):
+    rows = _rows(6)
+    rows[4]["amount"] = ["not", "a", "number"]  # can't be bound: a data error in batch 2
+    failed = []
+    report = stream_insert_transactions(db, rows, batch_size=3, on_failed=failed.append)
+    assert (report["inserted"], report["failed"]) == (3, 3)
+    assert "error" in report["batches"][1]
+    assert [r["description"] for r in failed[0]] == ["UBER TRIP 3", "UBER TRIP 4", "UBER TRIP 5"]
+    assert _count(db) == 3
+
+def test_locked_database_fails_the_whole_insert(db, tmp_path):
+    db.connection().exec_driver_sql("PRAGMA busy_timeout=0")
+    db.commit()
+    locker = sqlite3.connect(tmp_path / "app.db", isolation_level=None)
+    locker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(OperationalError, match="locked"):
+            stream_insert_transactions(db, _rows(5), batch_size=2)
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert _count(db) == 0
+
+def test_failed_rows_come_out_of_the_spend_summary():
+    spend = SpendSummary()
+    a = spend.add([{"description": "UBER TRIP", "amount": -10.0}, {"description": "ZZZ", "amount": -2.0}])
+    b = spend.add([{"description": "UBER TRIP", "amount": -5.0}])
+    before = spend.summary()
+    spend.remove(b)
+    (cat, subs), = spend.summary().items()
+    assert subs == {sub: round(amt - 5.0, 2) for sub, amt in before[cat].items()}
+    spend.remove(a)
+    assert spend.summary() == {}
+    assert spend.uncategorized_total == 0.0
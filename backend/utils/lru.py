@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """
+    Small thread-safe LRU map with hit/miss/eviction counters.
+    `maxsize` bounds the number of entries; with `maxbytes`, entries are also
+    evicted until the summed `weigh(value)` fits the budget (the newest entry
+    is always kept).
+    """
+
+    def __init__(self, maxsize: int = 128, maxbytes: Optional[int] = None,
+                 weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = max(1, int(maxsize))
+        self.maxbytes = maxbytes
+        self._weigh = weigh or (lambda _value: 0)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._weigh(value)
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > 1 and (
+                len(self._data) > self.maxsize
+                or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+            ):
+                old, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old, 0)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            self.nbytes -= self._sizes.pop(key, 0)
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "nbytes": self.nbytes,
+            "maxbytes": self.maxbytes,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,33 @@
+import pickle
+import tempfile
+from typing import Any, Iterator
+
+class BatchSpool:
+    """
+    Append-only store of pickled batches: kept in memory up to `max_bytes`,
+    then rolled over to an anonymous temp file. Iterating replays the batches
+    in order; close() (or the `with` block) frees the memory / file.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._f = tempfile.SpooledTemporaryFile(max_size=max_bytes)
+        self.batches = 0
+
+    def add(self, batch: Any) -> None:
+        self._f.seek(0, 2)
+        pickle.dump(batch, self._f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.batches += 1
+
+    def __iter__(self) -> Iterator[Any]:
+        self._f.seek(0)
+        for _ in range(self.batches):
+            yield pickle.load(self._f)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "BatchSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()